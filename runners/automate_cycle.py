@@ -1,91 +1,234 @@
 #!/usr/bin/env python3
-import time
-import subprocess
+import asyncio
 import sys
+import time
 import argparse
-from datetime import datetime
 from pathlib import Path
 
-# Paths to scripts relative to repo root
-# Assuming this script is run from repo root or scripts/research/
-PROJECT_ROOT = Path(r"f:\AI\cryptosentinel-v1")
-RESEARCH_DIR = PROJECT_ROOT / "scripts" / "research"
-SWARM_DIR = RESEARCH_DIR / "jules-swarm"
-
-LAUNCH_SCRIPT = RESEARCH_DIR / "launch_paper_analysis.py"
-SYN_SCRIPT = RESEARCH_DIR / "sync_backlog_status.py"
-MERGE_SCRIPT = SWARM_DIR / "merge_train.py"
-
-def run_command(command, cwd=None, description=""):
-    """Runs a shell command and returns the exit code."""
-    print(f"\n🚀 [{datetime.now().strftime('%H:%M:%S')}] Starting: {description}")
-    print(f"   Command: {command}")
-    
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.api import client_from_config
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.pipeline import Pipeline
+from research.swarm_core.poller import TERMINAL_STATES, StatusPoller, is_terminal
+from research.swarm_core.state import open_session_store
+from research.swarm_core.watcher import SessionWatcher, WatchResult
+from research.runners.paper_analysis import BACKLOG_PATH, build_launcher
+from research.utils.merge_train import CLUSTERS_FILE, check_gh_installed, merge_open_prs
+from research.utils.sync_backlog_status import sync_backlog
+
+# Consecutive empty backlog reads before the cycle stops launching
+EMPTY_READS = 2
+
+class ResearchCycle:
+    """One research swarm sharing a config, client and session store.
+
+    `feed` keeps up to `--limit` sessions in flight, launching whenever a
+    poll shows free slots. The maintenance stages (watch → merge → pull →
+    sync) run beside it: `watch` reads the states `feed` polls instead of
+    polling on its own, so merging never holds up launching.
+    """
+
+    def __init__(self, args, config, api, store):
+        self.args = args
+        self.config = config
+        self.api = api
+        self.store = store
+        self.backlog_empty = False
+        self.empty_reads = 0
+        # The launcher and sync both rewrite RESEARCH_BACKLOG.md (and git pull replaces it)
+        self.backlog_lock = asyncio.Lock()
+        self.done = False
+        self.in_flight = 0
+        self.unknown = 0
+        self.polled = asyncio.Condition()
+        self.watcher = SessionWatcher(StatusPoller(api, config.api_keys, args.poll_concurrency), store,
+                                      min_interval=args.min_interval, max_interval=args.max_interval)
+        self.launches = Pipeline(metrics=api.metrics, stages=[("launch", self.launch)])
+
+    def tracked_sessions(self):
+        """Non-terminal paper sessions, including ones whose state was never polled."""
+        return self.store.query(component_prefix="paper_", exclude_states=TERMINAL_STATES)
+
+    @staticmethod
+    def running(sessions):
+        # A session with no known state (e.g. imported without one, or gone from the API)
+        # does not hold a slot; only states the API reported count.
+        return [s for s in sessions if s.get("state") and not is_terminal(s["state"])]
+
+    async def _notify(self):
+        async with self.polled:
+            self.polled.notify_all()
+
+    async def feed(self):
+        interval = self.args.min_interval
+        try:
+            while True:
+                changed, launched = [], False
+                try:
+                    sessions = await asyncio.to_thread(self.tracked_sessions)
+                    if sessions:
+                        changed = await self.watcher.refresh(sessions)
+                    running = self.running(sessions)
+                    self.in_flight = len(running)
+                    unknown = sum(1 for s in sessions if not s.get("state"))
+                    if unknown and unknown != self.unknown:
+                        print(f"⚠️  {unknown} sessions have no known state; not counting them against --limit.")
+                    self.unknown = unknown
+                    await self._notify()
+
+                    if self.backlog_empty and not running:
+                        return
+                    if not self.backlog_empty and self.in_flight < self.args.limit:
+                        await self.launches.run()
+                        launched = True
+                except Exception as e:
+                    print(f"❌ Capacity check failed: {e}")
+                interval = self.watcher.next_interval(interval, bool(changed) or launched)
+                await asyncio.sleep(interval)
+        finally:
+            self.done = True
+            await self._notify()
+
+    async def launch(self):
+        capacity = self.args.limit - self.in_flight
+        launcher = build_launcher(self.config, self.args.repo, concurrency=self.args.concurrency,
+                                  limit=capacity, store=self.store, api=self.api,
+                                  adaptive=not self.args.fixed_concurrency)
+        async with self.backlog_lock:
+            stats = await launcher.run_async()
+        if stats is None:
+            # Only latch after a second empty read, so one bad read cannot end the run
+            self.empty_reads += 1
+            if self.empty_reads < EMPTY_READS:
+                return "no pending papers; checking again next round"
+            self.backlog_empty = True
+            return "no pending papers"
+        self.empty_reads = 0
+        self.in_flight += stats["dispatched"]
+        return f"{stats['dispatched']} dispatched into {capacity} free slots"
+
+    async def _running_ids(self):
+        sessions = await asyncio.to_thread(self.tracked_sessions)
+        return [s["sessionId"] for s in self.running(sessions)]
+
+    def _terminal_count(self, session_ids):
+        records = (self.store.get(sid) for sid in session_ids)
+        return sum(1 for r in records if r and is_terminal(r.get("state")))
+
+    async def watch(self):
+        async with self.polled:
+            batch = await self._running_ids()
+            while not batch and not self.done:
+                await self.polled.wait()
+                batch = await self._running_ids()
+        if not batch:
+            return "nothing in flight"
+
+        print(f"👀 Watching {len(batch)} sessions until {self.args.threshold:.0%} are terminal...")
+        result = WatchResult(len(batch))
+        started = time.monotonic()
+        while True:
+            result.terminal = await asyncio.to_thread(self._terminal_count, batch)
+            result.rounds += 1
+            result.elapsed = time.monotonic() - started
+            if result.share >= self.args.threshold or self.done:
+                break
+            remaining = self.args.max_wait - result.elapsed
+            if remaining <= 0:
+                result.timed_out = True
+                break
+            async with self.polled:
+                try:
+                    await asyncio.wait_for(self.polled.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        return result.summary()
+
+    async def merge(self):
+        if not check_gh_installed():
+            raise RuntimeError("GitHub CLI (gh) is not installed.")
+        report = await merge_open_prs(concurrency=self.args.merge_concurrency,
+                                      clusters_path=self.config.state_dir / CLUSTERS_FILE)
+        return f"merged {report.merged}/{report.total} PRs"
+
+    async def pull(self):
+        async with self.backlog_lock:
+            proc = await asyncio.create_subprocess_exec("git", "pull", "--ff-only", cwd=str(BACKLOG_PATH.parent))
+            code = await proc.wait()
+        if code != 0:
+            raise RuntimeError(f"git pull exited with {code}")
+        return None
+
+    async def sync(self):
+        async with self.backlog_lock:
+            updated = await asyncio.to_thread(sync_backlog, BACKLOG_PATH)
+        return f"{updated} papers marked completed"
+
+async def run_cycles(args):
+    config = SwarmConfig(env_path=repo_root / ".env")
+    store = open_session_store(config.state_dir)
+    api = client_from_config(config, pool_size=max(args.concurrency, args.poll_concurrency))
+    cycle = ResearchCycle(args, config, api, store)
+    pipeline = Pipeline(metrics=api.metrics, stages=[
+        ("watch", cycle.watch),
+        ("merge", cycle.merge),
+        ("pull", cycle.pull),
+        ("sync", cycle.sync),
+    ])
+    feeder = asyncio.create_task(cycle.feed())
+
     try:
-        # Using shell=True for Windows command compatibility
-        # check=False allows us to handle return codes manually
-        result = subprocess.run(command, shell=True, check=False, cwd=cwd)
-        
-        if result.returncode == 0:
-            print(f"✅ [{datetime.now().strftime('%H:%M:%S')}] Finished: {description}")
-            return 0
-        elif result.returncode == 10:
-             # Special code for "No more tasks"
-             return 10
-        else:
-            print(f"❌ [{datetime.now().strftime('%H:%M:%S')}] Failed (Exit: {result.returncode}): {description}")
-            return result.returncode
-
-    except Exception as e:
-        print(f"❌ [{datetime.now().strftime('%H:%M:%S')}] Exception: {description}")
-        print(f"   Error: {e}")
-        return -1
+        for i in range(1, args.batches + 1):
+            print(f"\n{'='*60}")
+            print(f"🔄 CYCLE {i}/{args.batches}")
+            print(f"{'='*60}")
+
+            results = await pipeline.run()
+            print(pipeline.report(results))
+
+            if cycle.done:
+                if cycle.backlog_empty:
+                    print("\n🎉 All research tasks completed! No pending papers found.")
+                break
+    finally:
+        feeder.cancel()
+        await asyncio.gather(feeder, return_exceptions=True)
+        await api.close()
+        store.close()
+        if cycle.launches.runs:
+            print(cycle.launches.totals_report())
+        if pipeline.runs:
+            print(pipeline.totals_report())
 
 def main():
     parser = argparse.ArgumentParser(description="Automate Research Swarm Cycle")
-    parser.add_argument("--limit", type=int, default=60, help="Number of tasks to launch per batch (default: 60)")
-    parser.add_argument("--interval", type=int, default=900, help="Sleep interval in seconds (default: 900 = 15 min)")
-    parser.add_argument("--batches", type=int, default=1000, help="Max number of batches to run (default: 1000)")
+    parser.add_argument("--repo", default="yuichiinumaru/void_research", help="GitHub repository name")
+    parser.add_argument("--limit", type=int, default=60, help="Max research sessions in flight (default: 60)")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Upper bound on create_session calls in flight; each key's limit adapts below it (default: 16)")
+    parser.add_argument("--fixed-concurrency", action="store_true", help="Keep exactly -n calls in flight instead of adapting")
+    parser.add_argument("--merge-concurrency", type=int, default=4, help="Max PR merges in flight")
+    parser.add_argument("--poll-concurrency", type=int, default=16, help="Max status requests in flight")
+    parser.add_argument("--threshold", type=float, default=0.8, help="Share of in-flight sessions that must finish before merging (default: 0.8)")
+    parser.add_argument("--min-interval", type=float, default=30, help="Fastest status poll interval in seconds (default: 30)")
+    parser.add_argument("--max-interval", type=float, default=900, help="Slowest status poll interval in seconds (default: 900 = 15 min)")
+    parser.add_argument("--max-wait", type=int, default=7200, help="Give up waiting for the threshold after this many seconds (default: 7200)")
+    parser.add_argument("--batches", type=int, default=1000, help="Max number of watch → merge → pull → sync cycles (default: 1000)")
     args = parser.parse_args()
 
-    print(f"🤖 Starting Research Automation Cycle")
-    print(f"   - Batch Size: {args.limit}")
-    print(f"   - Interval: {args.interval} seconds")
-    print(f"   - Scripts: \n     {LAUNCH_SCRIPT}\n     {MERGE_SCRIPT}\n     {SYN_SCRIPT}")
-    
-    for i in range(1, args.batches + 1):
-        print(f"\n{'='*60}")
-        print(f"🔄 CYCLE {i}/{args.batches}")
-        print(f"{'='*60}")
-
-        # Step 1: Launch Tasks
-        cmd_launch = f'python "{LAUNCH_SCRIPT}" --limit {args.limit}'
-        launch_code = run_command(cmd_launch, description="Launch Paper Analysis")
-        
-        if launch_code == 10:
-            print("\n🎉 All research tasks completed! No pending papers found.")
-            break
-        elif launch_code != 0:
-            print("⚠️ Issue during launch (Exit Code != 0), continuing cycle...")
-
-        # Step 2: Wait (15 mins)
-        print(f"\n⏳ Waiting {args.interval} seconds for agents to process...")
-        try:
-            time.sleep(args.interval)
-        except KeyboardInterrupt:
-            print("\n🛑 Cycle interrupted by user.")
-            sys.exit(0)
+    print("🤖 Starting Research Automation Cycle")
+    print(f"   - Sessions in flight: {args.limit}")
+    print(f"   - Merge threshold: {args.threshold:.0%} terminal")
+    print(f"   - Poll interval: {args.min_interval}-{args.max_interval} seconds")
+    print(f"   - Backlog: {BACKLOG_PATH}")
 
-        # Step 3: Merge Train (Process PRs)
-        cmd_merge = f'python "{MERGE_SCRIPT}"' 
-        run_command(cmd_merge, description="Merge Train (Process PRs)")
-
-        # Step 4: Git Pull (Sync Codebase)
-        run_command("git pull", cwd=PROJECT_ROOT, description="Git Pull (Sync Codebase)")
-
-        # Step 5: Sync Backlog (Update checkmarks)
-        cmd_sync = f'python "{SYN_SCRIPT}"'
-        run_command(cmd_sync, description="Sync Backlog Status")
+    try:
+        asyncio.run(run_cycles(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Cycle interrupted by user.")
+        sys.exit(0)
 
     print("\n🏁 Automation Cycle Completed.")
 
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+import sys
+import io
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.api import AsyncJulesAPI, JulesAPIError
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.journal import DispatchJournal
+from research.swarm_core.launcher import SwarmLauncher
+from research.swarm_core.poller import StatusPoller, apply_states
+from research.swarm_core.prompts import DynamicBuilder
+from research.swarm_core.providers import SimpleFileProvider
+from research.swarm_core.scheduler import KeyScheduler
+from research.swarm_core.sources import SourceCache
+from research.swarm_core.state import SessionStore
+from research.utils.merge_train import MERGED, CONFLICTED, MergeTrain, PullRequest
+from research.utils.mock_jules import MockJulesServer, MockProfile
+
+BENCH_REPO = "yuichiinumaru/void_research"
+
+class TimedJulesAPI(AsyncJulesAPI):
+    """AsyncJulesAPI that records the caller-visible latency of every request."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: List[float] = []
+        self.statuses: Dict[str, int] = {}
+
+    async def _request(self, api_key, method, path, **kwargs):
+        started = time.monotonic()
+        status = "ok"
+        try:
+            return await super()._request(api_key, method, path, **kwargs)
+        except JulesAPIError as e:
+            status = str(e.status or "transport")
+            raise
+        finally:
+            self.latencies.append(time.monotonic() - started)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def reset(self):
+        self.latencies, self.statuses = [], {}
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def scenario_result(ops: int, elapsed: float, latencies: List[float], statuses: Dict[str, int]) -> Dict[str, Any]:
+    return {
+        "ops": ops,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(ops / elapsed, 2) if elapsed > 0 else 0.0,
+        "requests": len(latencies),
+        "p50": round(percentile(latencies, 0.50), 4),
+        "p95": round(percentile(latencies, 0.95), 4),
+        "p99": round(percentile(latencies, 0.99), 4),
+        "max": round(max(latencies, default=0.0), 4),
+        "statuses": statuses,
+    }
+
+class Bench:
+    """Drives the swarm components against an in-process MockJulesServer."""
+
+    def __init__(self, args, workdir: Path):
+        self.args = args
+        self.workdir = workdir
+        self.keys = [f"bench-key-{i + 1}" for i in range(args.keys)]
+        self.store = SessionStore(workdir / "sessions.db")
+
+    def config(self, base_url: str) -> SwarmConfig:
+        env = self.workdir / ".env"
+        env.write_text(
+            f"JULES_API_KEYS={','.join(self.keys)}\n"
+            f"JULES_API_BASE={base_url}\n"
+            f"JULES_STATE_DIR={self.workdir}\n"
+            f"JULES_KEY_RPS={self.args.key_rps}\n"
+            f"JULES_KEY_BURST={self.args.key_burst}\n", encoding="utf-8")
+        return SwarmConfig(env_path=env)
+
+    def client(self, config: SwarmConfig, pool_size: int) -> TimedJulesAPI:
+        scheduler = KeyScheduler(config.api_keys, rate=config.key_rate, burst=config.key_burst)
+        return TimedJulesAPI(config.api_base_url, pool_size=pool_size,
+                             scheduler=scheduler, source_cache=SourceCache())
+
+    def quiet(self):
+        return redirect_stdout(sys.stdout if self.args.verbose else io.StringIO())
+
+    async def launch(self, config: SwarmConfig) -> Dict[str, Any]:
+        task_file = self.workdir / "tasks.txt"
+        task_file.write_text("\n".join(f"bench-task-{i:05d}" for i in range(self.args.sessions)), encoding="utf-8")
+        api = self.client(config, self.args.concurrency)
+        launcher = SwarmLauncher(
+            config=config,
+            provider=SimpleFileProvider(str(task_file)),
+            prompt_builder=DynamicBuilder("Benchmark task {component_name}"),
+            repo_name=BENCH_REPO,
+            concurrency=self.args.concurrency,
+            adaptive=not self.args.fixed_concurrency,
+            store=self.store,
+            journal=DispatchJournal(self.workdir / "journals" / "bench.jsonl"),
+            component_prefix="bench_",
+            dedupe=False,
+            api=api,
+        )
+        started = time.monotonic()
+        with self.quiet():
+            stats = await launcher.run_async()
+        elapsed = time.monotonic() - started
+        await api.close()
+        return scenario_result(stats["dispatched"] if stats else 0, elapsed, api.latencies, api.statuses)
+
+    async def poll(self, config: SwarmConfig) -> Dict[str, Any]:
+        sessions = self.store.query(component_prefix="bench_")
+        if not sessions:
+            return scenario_result(0, 0.0, [], {})
+        api = self.client(config, self.args.poll_concurrency)
+        poller = StatusPoller(api, config.api_keys, self.args.poll_concurrency)
+        started = time.monotonic()
+        fetched = 0
+        with self.quiet():
+            for _ in range(self.args.poll_rounds):
+                result = await poller.poll(sessions, skip_terminal=False)
+                self.store.upsert_many(apply_states(sessions, result))
+                fetched += result.fetched
+        elapsed = time.monotonic() - started
+        await api.close()
+        return scenario_result(fetched, elapsed, api.latencies, api.statuses)
+
+    async def merge(self) -> Dict[str, Any]:
+        rng = random.Random(self.args.seed)
+        prs = []
+        for n in range(1, self.args.prs + 1):
+            files = [{"path": f"docs/ideas/{n}.md"}]
+            if rng.random() < self.args.overlap_rate:
+                files.append({"path": "docs/RESEARCH_BACKLOG.md"})
+            prs.append(PullRequest({"number": n, "createdAt": f"{n:08d}", "files": files}))
+
+        latencies: List[float] = []
+        merge_latency, conflict_rate = self.args.merge_latency, self.args.conflict_rate
+
+        class SimulatedMergeTrain(MergeTrain):
+            # Stands in for `gh pr merge`: same scheduling, simulated GitHub latency
+            async def process_pr(self, pr):
+                started = time.monotonic()
+                await asyncio.sleep(merge_latency * rng.uniform(0.5, 1.5))
+                latencies.append(time.monotonic() - started)
+                return CONFLICTED if rng.random() < conflict_rate else MERGED
+
+        started = time.monotonic()
+        with self.quiet():
+            report = await SimulatedMergeTrain(self.args.merge_concurrency).run(prs)
+        elapsed = time.monotonic() - started
+        statuses = {outcome: report.count(outcome) for outcome in set(report.outcomes.values())}
+        return scenario_result(report.merged, elapsed, latencies, statuses)
+
+    async def run(self, scenarios: List[str]) -> Dict[str, Any]:
+        profile = MockProfile(latency=self.args.latency, jitter=self.args.jitter,
+                              tail_rate=self.args.tail_rate, tail_latency=self.args.tail_latency,
+                              error_rate=self.args.error_rate, throttle_rate=self.args.throttle_rate,
+                              key_rps=self.args.server_key_rps, step_seconds=self.args.step_seconds,
+                              keys=self.keys, seed=self.args.seed)
+        results: Dict[str, Any] = {}
+        async with MockJulesServer(profile) as server:
+            config = self.config(server.base_url)
+            for name in scenarios:
+                print(f"🏁 Running {name}...")
+                if name == "launch":
+                    results[name] = await self.launch(config)
+                elif name == "poll":
+                    results[name] = await self.poll(config)
+                elif name == "merge":
+                    results[name] = await self.merge()
+            results["server"] = dict(server.counters)
+        self.store.close()
+        return results
+
+def print_results(results: Dict[str, Any]):
+    print(f"\n{'scenario':<10}{'ops':>7}{'secs':>9}{'ops/s':>9}{'reqs':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, r in results.items():
+        if name == "server":
+            continue
+        print(f"{name:<10}{r['ops']:>7}{r['elapsed']:>9.2f}{r['throughput']:>9.2f}{r['requests']:>7}"
+              f"{r['p50']:>9.3f}{r['p95']:>9.3f}{r['p99']:>9.3f}{r['max']:>9.3f}  {r['statuses']}")
+    print(f"Mock server counters: {results.get('server', {})}")
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Lists regressions: throughput down or p95 up by more than `tolerance`."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if name == "server" or not base:
+            continue
+        if base["throughput"] and r["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {r['throughput']} < baseline {base['throughput']}")
+        if base["p95"] and r["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {r['p95']}s > baseline {base['p95']}s")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Jules Swarm benchmarks against a local mock API")
+    parser.add_argument("scenarios", nargs="*", default=["launch", "poll", "merge"], help="launch, poll and/or merge")
+    parser.add_argument("--sessions", type=int, default=200, help="Sessions to launch (and then poll)")
+    parser.add_argument("--keys", type=int, default=3, help="Number of mock API keys")
+    parser.add_argument("-n", "--concurrency", type=int, default=8, help="Launcher create_session calls in flight (upper bound)")
+    parser.add_argument("--fixed-concurrency", action="store_true", help="Disable the launcher's adaptive per-key limit")
+    parser.add_argument("--poll-concurrency", type=int, default=16)
+    parser.add_argument("--poll-rounds", type=int, default=3)
+    parser.add_argument("--key-rps", type=float, default=20.0, help="Client-side per-key rate (JULES_KEY_RPS)")
+    parser.add_argument("--key-burst", type=float, default=20.0, help="Client-side per-key burst (JULES_KEY_BURST)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock base latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--tail-rate", type=float, default=0.01)
+    parser.add_argument("--tail-latency", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--server-key-rps", type=float, default=0.0, help="Mock per-key rate limit (0 = none)")
+    parser.add_argument("--step-seconds", type=float, default=0.5, help="Mock time per session state")
+    parser.add_argument("--prs", type=int, default=200, help="Simulated PRs for the merge scenario")
+    parser.add_argument("--overlap-rate", type=float, default=0.1, help="Share of PRs touching a shared file")
+    parser.add_argument("--conflict-rate", type=float, default=0.02)
+    parser.add_argument("--merge-latency", type=float, default=0.2, help="Simulated gh pr merge latency (s)")
+    parser.add_argument("--merge-concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default: 0.2)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show component output")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="jules-bench-") as tmp:
+        results = asyncio.run(Bench(args, Path(tmp)).run(args.scenarios))
+
+    print_results(results)
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"📝 Results written to {args.json}")
+    if args.baseline:
+        regressions = compare(results, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"📉 {line}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against baseline.")
+
+if __name__ == "__main__":
+    main()
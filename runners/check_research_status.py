@@ -1,54 +1,41 @@
 #!/usr/bin/env python3
-import os
+import sys
 import json
-import requests
+import argparse
 from pathlib import Path
 
-# Configuration with absolute paths for Windows
-API_BASE_URL = "https://jules.googleapis.com/v1alpha"
-PROJECT_ROOT = Path(r"f:\AI\cryptosentinel-v1")
-ENV_FILE_PATH = PROJECT_ROOT / "scripts" / "research" / "jules-swarm" / ".env"
-STATE_FILE_PATH = PROJECT_ROOT / "scripts" / "research" / "jules-swarm" / "scripts" / "state" / "sessions.json"
-
-def load_keys():
-    if not ENV_FILE_PATH.exists(): return []
-    with open(ENV_FILE_PATH, "r") as f:
-        for line in f:
-            if line.startswith("JULES_API_KEYS="):
-                val = line.split("=", 1)[1].strip().strip('"').strip("'")
-                return [k.strip() for k in val.split(",") if k.strip()]
-    return []
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.poller import poll_sessions, apply_states
+from research.swarm_core.state import open_session_store
 
 def main():
-    keys = load_keys()
-    if not keys: 
+    parser = argparse.ArgumentParser(description="Check Research (paper_*) Session Status")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Max status requests in flight")
+    parser.add_argument("--refresh-all", action="store_true", help="Re-poll sessions already in a terminal state")
+    args = parser.parse_args()
+
+    config = SwarmConfig(env_path=repo_root / ".env")
+    if not config.api_keys:
         print("Keys not found")
         return
-    
-    if not STATE_FILE_PATH.exists(): 
-        print("State not found")
-        return
 
-    with open(STATE_FILE_PATH, "r") as f:
-        all_s = json.load(f)
-    
-    res_s = [s for s in all_s if s.get("component", "").startswith("paper_")]
-    results = []
-    
+    store = open_session_store(config.state_dir)
+    res_s = store.query(component_prefix="paper_")
+
     print(f"Checking {len(res_s)} sessions...", flush=True)
-    
-    for i, s in enumerate(res_s):
-        k = keys[i % len(keys)]
-        try:
-            r = requests.get(f"{API_BASE_URL}/{s['sessionId']}", headers={"x-goog-api-key": k}, timeout=10)
-            data = r.json()
-            state = data.get("state", "RUNNING")
-            results.append(state)
-        except:
-            results.append("ERROR")
-    
-    stats = {st: results.count(st) for st in set(results)}
-    print(json.dumps(stats, indent=2), flush=True)
+
+    result = poll_sessions(config, res_s, concurrency=args.concurrency,
+                           skip_terminal=not args.refresh_all)
+
+    print(json.dumps(result.counts(), indent=2), flush=True)
+    print(result.summary(), flush=True)
+
+    store.upsert_many(apply_states(res_s, result))
+    store.close()
 
 if __name__ == "__main__":
     main()
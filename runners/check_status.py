@@ -1,6 +1,5 @@
 #!/usr/bin/env python3
 import sys
-import json
 import argparse
 from pathlib import Path
 
@@ -9,58 +8,60 @@ repo_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(repo_root))
 
 from research.swarm_core.config import SwarmConfig
-from research.swarm_core.api import JulesAPI
+from research.swarm_core.poller import poll_sessions, apply_states, is_terminal
+from research.swarm_core.state import open_session_store
+from research.swarm_core.stuck import DEFAULT_NUDGE, poke_stuck_sessions
 
 def main():
     parser = argparse.ArgumentParser(description="Check Swarm Status")
-    parser.add_argument("--poke", action="store_true", help="Send 'hi' to sessions that seem stuck (not implemented yet)")
+    parser.add_argument("--poke", action="store_true", help="Approve waiting plans and nudge sessions that seem stuck")
+    parser.add_argument("--idle-minutes", type=float, default=60, help="With --poke: minutes without activity that count as stuck (default: 60)")
+    parser.add_argument("--message", default=DEFAULT_NUDGE, help="With --poke: text sent to stuck sessions")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Max status requests in flight")
+    parser.add_argument("--refresh-all", action="store_true", help="Re-poll sessions already in a terminal state")
     args = parser.parse_args()
 
-    # Config & API
+    # Config
     config = SwarmConfig(env_path=repo_root / ".env")
-    api = JulesAPI(config.api_base_url)
-    
-    api_keys = config.api_keys
-    if not api_keys:
+
+    if not config.api_keys:
         print("❌ Error: API keys not found.")
         sys.exit(1)
-    
-    # State File
-    state_file = repo_root / "research/state/sessions.json"
-    if not state_file.exists():
-        print(f"⚠️  No session state file found at {state_file}")
+
+    # State Store
+    store = open_session_store(config.state_dir)
+    sessions = store.query()
+    if not sessions:
+        print(f"⚠️  No sessions tracked in {store.path}")
         sys.exit(0)
-        
-    with open(state_file, "r") as f:
-        sessions = json.load(f)
+
+    result = poll_sessions(config, sessions, concurrency=args.concurrency,
+                           skip_terminal=not args.refresh_all)
 
     print(f"{'COMPONENT':<20} | {'STATUS':<15} | {'SESSION ID':<40}")
     print("-" * 80)
-    
+
     completed_count = 0
-    
-    for i, session in enumerate(sessions):
-        # Round Robin Key
-        api_key = api_keys[i % len(api_keys)]
-        
-        details = api.get_session_details(api_key, session["sessionId"])
-        
-        status = "UNKNOWN"
-        if details:
-            if details.get("state"):
-                status = details.get("state")
-            elif details.get("outputs"):
-                status = "DONE (PR Ready)"
-            else:
-                status = "RUNNING"
-        
+
+    for session in sessions:
+        status = result.statuses.get(session["sessionId"], "UNKNOWN")
         print(f"{session.get('component', 'N/A'):<20} | {status:<15} | {session['sessionId']:<40}")
-        
-        if "DONE" in str(status).upper() or "SUCCEEDED" in str(status).upper():
+
+        if "DONE" in str(status).upper() or "SUCCEEDED" in str(status).upper() or str(status).upper() == "COMPLETED":
             completed_count += 1
 
     print("-" * 80)
     print(f"Summary: {completed_count}/{len(sessions)} tasks completed.")
+    print(result.summary())
+
+    # Remember terminal states so the next run can skip them
+    store.upsert_many(apply_states(sessions, result))
+
+    if args.poke:
+        running = [s for s in sessions if not is_terminal(s.get("state"))]
+        poke_stuck_sessions(config, store, running, idle_threshold=args.idle_minutes * 60,
+                            message=args.message, refresh=False, concurrency=args.concurrency)
+    store.close()
 
 if __name__ == "__main__":
     main()
@@ -1,59 +1,63 @@
+#!/usr/bin/env python3
+import sys
 import asyncio
-import aiohttp
-import os
+import argparse
 from pathlib import Path
-from rich.progress import Progress
 
-PAPER_IDS_FILE = Path("scripts/research/paper_ids.txt")
-OUTPUT_DIR = Path("docs/arxiv")
-BASE_URL = "https://arxiv.org/pdf/{}.pdf"
-CONCURRENCY = 5
-
-async def fetch_paper(session, paper_id, progress, task_id):
-    url = BASE_URL.format(paper_id)
-    output_path = OUTPUT_DIR / f"{paper_id}.pdf"
-
-    if output_path.exists():
-        progress.update(task_id, advance=1)
-        return
-
-    try:
-        async with session.get(url) as response:
-            if response.status == 200:
-                content = await response.read()
-                with open(output_path, "wb") as f:
-                    f.write(content)
-                progress.update(task_id, advance=1)
-            else:
-                progress.console.print(f"[red]Failed {paper_id}: HTTP {response.status}")
-                progress.update(task_id, advance=1)
-    except Exception as e:
-        progress.console.print(f"[red]Error fetching {paper_id}: {e}")
-        progress.update(task_id, advance=1)
-
-async def main():
-    if not PAPER_IDS_FILE.exists():
-        print(f"Error: {PAPER_IDS_FILE} not found.")
-        return
-
-    with open(PAPER_IDS_FILE, "r") as f:
-        paper_ids = [line.strip() for line in f if line.strip()]
+from rich.progress import Progress
 
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.retry import RetryPolicy
+from research.utils.paper_fetcher import ARXIV_PDF_URL, FAILED, UNSUPPORTED, PaperFetcher, read_paper_ids
+
+PAPER_IDS_FILE = repo_root / "research/data/paper_ids.txt"
+OUTPUT_DIR = repo_root / "research/docs/arxiv"
+
+async def run(fetcher, paper_ids):
+    with Progress() as progress:
+        task_id = progress.add_task("[cyan]Downloading papers...", total=len(paper_ids))
+
+        def on_done(paper_id, outcome, error):
+            if outcome == FAILED:
+                progress.console.print(f"[red]Failed {paper_id}: {error}")
+            elif outcome == UNSUPPORTED:
+                progress.console.print(f"[yellow]No PDF link known for {paper_id}")
+            progress.update(task_id, advance=1)
+
+        return await fetcher.fetch_all(paper_ids, on_done=on_done)
+
+def main():
+    parser = argparse.ArgumentParser(description="Download paper PDFs (resumable, crash-safe)")
+    parser.add_argument("--ids", default=str(PAPER_IDS_FILE), help="File with one arXiv id or paper link per line (default: data/paper_ids.txt)")
+    parser.add_argument("--output", default=str(OUTPUT_DIR), help="Directory for the PDFs (default: docs/arxiv)")
+    parser.add_argument("--url", default=ARXIV_PDF_URL, help="URL template for arXiv ids; {} is replaced by the id")
+    parser.add_argument("-n", "--concurrency", type=int, default=8, help="Downloads in flight (default: 8)")
+    parser.add_argument("--per-host", type=int, default=4, help="Max connections per host (default: 4)")
+    parser.add_argument("--retries", type=int, default=5, help="Attempts per paper, including the first (default: 5)")
+    parser.add_argument("--backoff", type=float, default=1.0, help="Base retry delay in seconds (default: 1)")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds without data before a download is retried (default: 120)")
+    parser.add_argument("--no-verify", action="store_true", help="Accept files that do not start with the PDF header")
+    args = parser.parse_args()
+
+    ids_file = Path(args.ids)
+    if not ids_file.exists():
+        print(f"Error: {ids_file} not found.")
+        sys.exit(1)
+
+    paper_ids = read_paper_ids(ids_file)
     print(f"Found {len(paper_ids)} papers to download.")
 
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-
-    semaphore = asyncio.Semaphore(CONCURRENCY)
-
-    async def sem_fetch(session, paper_id, progress, task_id):
-        async with semaphore:
-            await fetch_paper(session, paper_id, progress, task_id)
-
-    async with aiohttp.ClientSession() as session:
-        with Progress() as progress:
-            task_id = progress.add_task("[cyan]Downloading papers...", total=len(paper_ids))
-            tasks = [sem_fetch(session, pid, progress, task_id) for pid in paper_ids]
-            await asyncio.gather(*tasks)
+    fetcher = PaperFetcher(args.output, url_template=args.url, concurrency=args.concurrency,
+                           per_host=args.per_host, timeout=args.timeout, verify_pdf=not args.no_verify,
+                           retry_policy=RetryPolicy(max_attempts=args.retries, base_delay=args.backoff,
+                                                    max_delay=60.0))
+    report = asyncio.run(run(fetcher, paper_ids))
+    print(report.summary())
+    if report.count(FAILED):
+        sys.exit(1)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
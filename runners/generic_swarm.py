@@ -12,13 +12,17 @@ from research.swarm_core.config import SwarmConfig
 from research.swarm_core.providers import SimpleFileProvider
 from research.swarm_core.prompts import FileTemplateBuilder
 from research.swarm_core.launcher import SwarmLauncher
+from research.swarm_core.state import open_session_store
+from research.swarm_core.journal import DispatchJournal
 
 def main():
     parser = argparse.ArgumentParser(description="Jules Swarm Launcher (Universal Core)")
     parser.add_argument("-t", "--type", required=True, help="Type of component to refactor (atoms, molecules, organisms, or custom)")
-    parser.add_argument("-n", "--concurrency", type=int, default=5, help="Batch size")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Upper bound on create_session calls in flight; each key's limit adapts below it (default: 16)")
+    parser.add_argument("--fixed-concurrency", action="store_true", help="Keep exactly -n calls in flight instead of adapting")
     parser.add_argument("--repo", required=True, help="GitHub repository name (owner/repo)")
     parser.add_argument("--dry-run", action="store_true", help="Dry run mode")
+    parser.add_argument("--allow-duplicates", action="store_true", help="Dispatch even if an identical prompt already ran against this repo")
     
     args = parser.parse_args()
 
@@ -59,7 +63,11 @@ def main():
         prompt_builder=builder,
         repo_name=args.repo,
         concurrency=args.concurrency,
-        dry_run=args.dry_run
+        adaptive=not args.fixed_concurrency,
+        dry_run=args.dry_run,
+        dedupe=not args.allow_duplicates,
+        store=None if args.dry_run else open_session_store(config.state_dir),
+        journal=DispatchJournal(config.state_dir / "journals" / f"generic_{args.type}.jsonl")
     )
     
     try:
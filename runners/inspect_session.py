@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 import sys
 import json
+import asyncio
 import argparse
 from pathlib import Path
 
@@ -9,53 +10,74 @@ repo_root = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(repo_root))
 
 from research.swarm_core.config import SwarmConfig
-from research.swarm_core.api import JulesAPI
+from research.swarm_core.api import JulesAPIError, client_from_config
+from research.swarm_core.activities import ActivitySync, activity_kind
+from research.swarm_core.state import open_session_store
 
-def main():
-    parser = argparse.ArgumentParser(description="Inspect Jules Session Details")
-    parser.add_argument("ids", nargs="+", help="Session IDs to inspect (e.g. sessions/12345)")
-    args = parser.parse_args()
-
-    # Config & API
-    config = SwarmConfig(env_path=repo_root / ".env")
-    api = JulesAPI(config.api_base_url)
+def describe(activity) -> str:
+    kind = activity_kind(activity)
+    body = activity.get(kind)
+    detail = ""
+    if isinstance(body, dict):
+        detail = body.get("title") or body.get("agentMessage") or body.get("userMessage") or body.get("reason") or ""
+    return f"{activity.get('createTime', '?')} {activity.get('originator', '?'):<6} {kind} {str(detail)[:80]}"
 
-    api_keys = config.api_keys
-    if not api_keys:
-        print("❌ Error: API keys not found.")
-        sys.exit(1)
-
-    print(f"🔑 Using API Key ending in ...{api_keys[0][-6:]}")
+async def inspect(config, store, ids, history):
+    async with client_from_config(config, pool_size=8) as api:
+        syncer = ActivitySync(api, store, config.api_keys)
+        for i, session_id in enumerate(ids):
+            print(f"\n[{i+1}/{len(ids)}] Inspecting: {session_id}")
+            record = store.get(session_id) or {"sessionId": session_id}
+            api_key = syncer.key_for(record)
+            print(f"🔑 Using API Key ending in ...{api_key[-6:]}")
+            try:
+                data = await api.get_session_details(api_key, session_id)
+                new = await syncer.sync(api_key, session_id)
+            except JulesAPIError as e:
+                print(f"❌ Error fetching session {session_id}: {e}")
+                print("-" * 60)
+                continue
 
-    for i, session_id in enumerate(args.ids):
-        print(f"\n[{i+1}/{len(args.ids)}] Inspetcting: {session_id}")
-        data = api.get_session_details(api_keys[0], session_id)
-        
-        if data:
             print(f"✅ State: {data.get('state', 'UNKNOWN')}")
             print(f"   Name: {data.get('name')}")
             print(f"   CreateTime: {data.get('createTime')}")
-            
-            # Probe extra resources
-            endpoints = ["suggestions", "history", "turns", "messages", "events"]
-            for ep in endpoints:
-                 print(f"📡  Probing: .../{ep}")
-                 res_data = api.get_session_resource(api_keys[0], session_id, ep)
-                 if res_data:
-                     print(f"   ✅ FOUND DATA at /{ep}!")
-                     data[ep] = res_data
-            
-            print("\n📋  Keys found in response:", list(data.keys()))
-            
+
+            cursor = store.activity_cursor(session_id) or {}
+            total = cursor.get("count", 0)
+            print(f"\n📜 {total} activities stored, {len(new)} new since the last sync.")
+            shown = store.activities(session_id, after=max(0, total - history)) if history else []
+            for activity in shown:
+                print(f"   {describe(activity)}")
+
             if 'error' in data:
                 print(f"\n❌ ERROR FOUND: {json.dumps(data['error'], indent=2)}")
-                
+
             if 'outputs' in data:
                 print(f"\n📤 OUTPUTS: {json.dumps(data['outputs'], indent=2)}")
-            
+
             print("\n--- Full JSON Dump (truncated) ---")
             print(json.dumps(data, indent=2)[:2000] + "...")
-        print("-" * 60)
+            print("-" * 60)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect Jules Session Details")
+    parser.add_argument("ids", nargs="+", help="Session IDs to inspect (e.g. sessions/12345)")
+    parser.add_argument("--history", type=int, default=10, help="Show the last N synced activities (default: 10)")
+    args = parser.parse_args()
+
+    # Config
+    config = SwarmConfig(env_path=repo_root / ".env")
+
+    if not config.api_keys:
+        print("❌ Error: API keys not found.")
+        sys.exit(1)
+
+    # Activities are synced into the state store; only new ones are downloaded
+    store = open_session_store(config.state_dir)
+    try:
+        asyncio.run(inspect(config, store, args.ids, args.history))
+    finally:
+        store.close()
 
 if __name__ == "__main__":
     main()
@@ -12,6 +12,8 @@ from research.swarm_core.config import SwarmConfig
 from research.swarm_core.providers import BacklogProvider
 from research.swarm_core.prompts import DynamicBuilder
 from research.swarm_core.launcher import SwarmLauncher
+from research.swarm_core.state import open_session_store
+from research.swarm_core.journal import DispatchJournal
 
 # Define the specific prompt template for paper analysis
 PAPER_ANALYSIS_PROMPT_TEMPLATE = """
@@ -51,36 +53,51 @@ REQUIREMENT:
 !EXECUTE_PROTOCOL
 """
 
+BACKLOG_PATH = repo_root / "research/docs/RESEARCH_BACKLOG.md"
+
+def build_launcher(config, repo, concurrency=16, limit=0, dry_run=False, dedupe=True,
+                   store=None, api=None, adaptive=True) -> SwarmLauncher:
+    """Paper-analysis launcher over the research backlog; `store`/`api` may be shared by a caller."""
+    if store is None and not dry_run:
+        store = open_session_store(config.state_dir)
+    return SwarmLauncher(
+        config=config,
+        provider=BacklogProvider(str(BACKLOG_PATH)),
+        prompt_builder=DynamicBuilder(PAPER_ANALYSIS_PROMPT_TEMPLATE),
+        repo_name=repo,
+        concurrency=concurrency,
+        adaptive=adaptive,
+        dry_run=dry_run,
+        dedupe=dedupe,
+        limit=limit,
+        store=store,
+        journal=DispatchJournal(config.state_dir / "journals" / "paper_analysis.jsonl"),
+        component_prefix="paper_",
+        api=api
+    )
+
 def main():
     parser = argparse.ArgumentParser(description="Jules Swarm: Paper Analysis Launcher")
-    parser.add_argument("-n", "--concurrency", type=int, default=3, help="Batch size")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Upper bound on create_session calls in flight; each key's limit adapts below it (default: 16)")
+    parser.add_argument("--fixed-concurrency", action="store_true", help="Keep exactly -n calls in flight instead of adapting")
     parser.add_argument("--repo", default="yuichiinumaru/void_research", help="GitHub repository name")
+    parser.add_argument("--limit", type=int, default=0, help="Max papers to launch (0 = all pending)")
     parser.add_argument("--dry-run", action="store_true", help="Dry run mode")
+    parser.add_argument("--allow-duplicates", action="store_true", help="Dispatch even if an identical prompt already ran against this repo")
     args = parser.parse_args()
 
     # Config
     config = SwarmConfig(env_path=repo_root / ".env")
     
     # Provider (Backlog)
-    backlog_path = repo_root / "research/docs/RESEARCH_BACKLOG.md"
-    if not backlog_path.exists():
-        print(f"❌ Error: Backlog file not found at {backlog_path}")
+    if not BACKLOG_PATH.exists():
+        print(f"❌ Error: Backlog file not found at {BACKLOG_PATH}")
         sys.exit(1)
-        
-    provider = BacklogProvider(str(backlog_path))
-    
-    # Prompt
-    builder = DynamicBuilder(PAPER_ANALYSIS_PROMPT_TEMPLATE)
 
     # Launch
-    launcher = SwarmLauncher(
-        config=config,
-        provider=provider,
-        prompt_builder=builder,
-        repo_name=args.repo,
-        concurrency=args.concurrency,
-        dry_run=args.dry_run
-    )
+    launcher = build_launcher(config, args.repo, concurrency=args.concurrency, limit=args.limit,
+                              dry_run=args.dry_run, dedupe=not args.allow_duplicates,
+                              adaptive=not args.fixed_concurrency)
     
     try:
         launcher.run()
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import sys
+import json
 import argparse
 from pathlib import Path
 
@@ -9,30 +10,63 @@ sys.path.insert(0, str(repo_root))
 
 from research.swarm_core.config import SwarmConfig
 from research.swarm_core.api import JulesAPI
+from research.swarm_core.poller import TERMINAL_STATES
+from research.swarm_core.state import open_session_store
+from research.swarm_core.stuck import DEFAULT_NUDGE, poke_stuck_sessions
+
+def poke_stuck(config, args):
+    store = open_session_store(config.state_dir)
+    try:
+        sessions = store.query(component_prefix=args.prefix, exclude_states=TERMINAL_STATES)
+        if not sessions:
+            print("✅ No running sessions tracked.")
+            return
+        poke_stuck_sessions(config, store, sessions, idle_threshold=args.idle_minutes * 60,
+                            message=args.message, approve_plans=not args.no_approve,
+                            dry_run=args.dry_run, concurrency=args.concurrency, pace=args.pace)
+    finally:
+        store.close()
 
 def main():
     parser = argparse.ArgumentParser(description="Poke Jules Session")
-    parser.add_argument("id", help="Session ID (e.g. sessions/12345)")
-    parser.add_argument("message", help="Message to send")
+    parser.add_argument("id", nargs="?", help="Session ID (e.g. sessions/12345); omit with --stuck")
+    parser.add_argument("message", nargs="?", help="Message to send")
+    parser.add_argument("--stuck", action="store_true", help="Scan all running sessions and unblock the stuck ones")
+    parser.add_argument("--message", dest="bulk_message", default=DEFAULT_NUDGE, help="Nudge sent in --stuck mode")
+    parser.add_argument("--prefix", help="--stuck: only sessions whose component starts with this")
+    parser.add_argument("--idle-minutes", type=float, default=60, help="--stuck: minutes without activity that count as stuck (default: 60)")
+    parser.add_argument("--no-approve", action="store_true", help="--stuck: nudge sessions waiting for plan approval instead of approving")
+    parser.add_argument("--pace", type=float, default=1.0, help="--stuck: seconds between two pokes on the same key (default: 1)")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="--stuck: max scan requests in flight")
+    parser.add_argument("--dry-run", action="store_true", help="--stuck: only report what would be sent")
     args = parser.parse_args()
 
     # Config & API
     config = SwarmConfig(env_path=repo_root / ".env")
-    api = JulesAPI(config.api_base_url)
 
     api_keys = config.api_keys
     if not api_keys:
         print("❌ Error: API keys not found.")
         sys.exit(1)
 
+    if args.stuck:
+        if args.id:
+            parser.error("--stuck scans every tracked session; pass the nudge with --message")
+        args.message = args.bulk_message
+        poke_stuck(config, args)
+        return
+    if not args.id or not args.message:
+        parser.error("a session id and a message are required (or use --stuck)")
+
+    api = JulesAPI(config.api_base_url)
+
     print(f"📡  Sending Input to: {args.id}")
     print(f"    Message: '{args.message}'")
-    
+
     result = api.send_input(api_keys[0], args.id, args.message)
-    
+
     if result:
         print("✅ Input Sent Successfully!")
-        import json
         print(json.dumps(result, indent=2))
 
 if __name__ == "__main__":
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+import sys
+import json
+import asyncio
+import argparse
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.api import client_from_config
+from research.swarm_core.activities import ActivitySync, ActivityTail, activity_kind
+from research.swarm_core.poller import TERMINAL_STATES
+from research.swarm_core.state import open_session_store
+
+def activity_line(session, activity) -> str:
+    return json.dumps({
+        "session": session["sessionId"],
+        "component": session.get("component"),
+        "kind": activity_kind(activity),
+        "originator": activity.get("originator"),
+        "createTime": activity.get("createTime"),
+        "activity": activity,
+    })
+
+async def tail(config, store, sessions, args, out):
+    def emit(session, activity):
+        out.write(activity_line(session, activity) + "\n")
+        out.flush()
+
+    if args.replay:
+        for session in sessions:
+            count = (store.activity_cursor(session["sessionId"]) or {}).get("count", 0)
+            for activity in store.activities(session["sessionId"], after=max(0, count - args.replay)):
+                emit(session, activity)
+
+    async with client_from_config(config, pool_size=args.concurrency) as api:
+        syncer = ActivitySync(api, store, config.api_keys, args.concurrency)
+        tailer = ActivityTail(syncer, min_interval=args.min_interval, max_interval=args.max_interval)
+        return await tailer.run(sessions, emit, max_wait=args.max_wait)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream new session activities as JSON lines")
+    parser.add_argument("ids", nargs="*", help="Session IDs to follow (default: every tracked session still running)")
+    parser.add_argument("--prefix", help="Only follow tracked sessions whose component starts with this (e.g. paper_)")
+    parser.add_argument("--replay", type=int, default=0, help="First print the last N already-synced activities per session")
+    parser.add_argument("-n", "--concurrency", type=int, default=16, help="Max activity requests in flight")
+    parser.add_argument("--min-interval", type=float, default=5, help="Poll interval while a session is active (default: 5)")
+    parser.add_argument("--max-interval", type=float, default=300, help="Poll interval once a session goes idle (default: 300)")
+    parser.add_argument("--max-wait", type=float, help="Stop after this many seconds (default: until every session finishes)")
+    args = parser.parse_args()
+
+    config = SwarmConfig(env_path=repo_root / ".env")
+    if not config.api_keys:
+        print("❌ Error: API keys not found.", file=sys.stderr)
+        sys.exit(1)
+
+    store = open_session_store(config.state_dir)
+    if args.ids:
+        sessions = [store.get(i) or {"sessionId": i} for i in args.ids]
+    else:
+        sessions = store.query(component_prefix=args.prefix, exclude_states=TERMINAL_STATES)
+    if not sessions:
+        print("⚠️  No sessions to follow.", file=sys.stderr)
+        store.close()
+        sys.exit(0)
+
+    # stdout carries only JSON lines; progress and errors go to stderr
+    out = sys.stdout
+    print(f"📡 Following {len(sessions)} sessions...", file=sys.stderr)
+    try:
+        with redirect_stdout(sys.stderr):
+            emitted = asyncio.run(tail(config, store, sessions, args, out))
+        print(f"✅ {emitted} new activities streamed.", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .api import AsyncJulesAPI, JulesAPIError, client_from_config
+from .config import SwarmConfig
+from .state import SessionStore
+
+# Activities that end a session: once synced, nothing new can follow
+FINAL_ACTIVITIES = ("sessionCompleted", "sessionFailed")
+
+# Fields every activity has; the remaining key names its kind (planGenerated, agentMessaged, ...)
+COMMON_FIELDS = {"name", "id", "createTime", "originator", "description"}
+
+
+def activity_kind(activity: Dict[str, Any]) -> str:
+    for key in activity:
+        if key not in COMMON_FIELDS:
+            return key
+    return "unknown"
+
+
+class SyncResult:
+    def __init__(self):
+        self.new: Dict[str, List[Dict[str, Any]]] = {}
+        self.pages = 0
+        self.skipped = 0
+        self.errors = 0
+        self.elapsed = 0.0
+
+    @property
+    def total_new(self) -> int:
+        return sum(len(activities) for activities in self.new.values())
+
+    def summary(self) -> str:
+        return (f"📜 Synced {len(self.new)} sessions in {self.elapsed:.1f}s with {self.pages} pages: "
+                f"{self.total_new} new activities; {self.skipped} already complete, {self.errors} errors.")
+
+
+class ActivitySync:
+    """Incremental copy of `sessions.activities` into the SessionStore.
+
+    Each session keeps a cursor: the page token of the last page read and
+    the last activity seen. A sync resumes from that page, drops what it
+    already has and follows nextPageToken from there, so a re-sync costs
+    one page plus whatever is new. Sessions whose final activity has been
+    synced are not requested again. If the API rejects a stale page token,
+    the session is re-read from the start (duplicates are ignored).
+    """
+
+    def __init__(self, api: AsyncJulesAPI, store: SessionStore, api_keys: List[str],
+                 concurrency: int = 16, page_size: int = 50):
+        self.api = api
+        self.store = store
+        self.api_keys = api_keys
+        self.concurrency = max(1, concurrency)
+        self.page_size = page_size
+
+    def key_for(self, session: Dict[str, Any], i: int = 0) -> str:
+        index = session.get("keyIndex")
+        if isinstance(index, int) and 0 <= index < len(self.api_keys):
+            return self.api_keys[index]
+        return self.api_keys[i % len(self.api_keys)]
+
+    async def sync(self, api_key: str, session_id: str, result: Optional[SyncResult] = None) -> List[Dict[str, Any]]:
+        """Fetches and stores the activities of `session_id` not seen before; returns them."""
+        # Store calls block on SQLite, so they run off the event loop
+        cursor = await asyncio.to_thread(self.store.activity_cursor, session_id) or {}
+        if cursor.get("done"):
+            if result is not None:
+                result.skipped += 1
+            return []
+
+        token, last_id = cursor.get("pageToken"), cursor.get("lastId")
+        resumed = last_id is None  # nothing to skip past yet
+        new: List[Dict[str, Any]] = []
+        while True:
+            try:
+                page = await self.api.list_activities_page(api_key, session_id, self.page_size, token)
+            except JulesAPIError as e:
+                if token and e.status == 400:
+                    token = None  # stale token: re-read from the start, duplicates are dropped on insert
+                    continue
+                raise
+            if result is not None:
+                result.pages += 1
+            activities = page.get("activities", [])
+            if not resumed:
+                names = [a.get("name") for a in activities]
+                if last_id in names:
+                    activities = activities[names.index(last_id) + 1:]
+                    resumed = True
+            new.extend(activities)
+            next_token = page.get("nextPageToken")
+            if not next_token:
+                break
+            token = next_token
+
+        done = any(activity_kind(a) in FINAL_ACTIVITIES for a in new)
+        return await asyncio.to_thread(self.store.add_activities, session_id, new, token, done)
+
+    async def sync_many(self, sessions: List[Dict[str, Any]]) -> SyncResult:
+        result = SyncResult()
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(i: int, session: Dict[str, Any]):
+            session_id = session["sessionId"]
+            async with semaphore:
+                try:
+                    result.new[session_id] = await self.sync(self.key_for(session, i), session_id, result)
+                except JulesAPIError as e:
+                    print(f"❌ Error syncing activities of {session_id}: {e}")
+                    result.errors += 1
+
+        with self.api.metrics.span("activities.sync", sessions=len(sessions)) as span:
+            await asyncio.gather(*(one(i, s) for i, s in enumerate(sessions)))
+            span.update(pages=result.pages, new=result.total_new, errors=result.errors)
+        result.elapsed = time.monotonic() - started
+        return result
+
+
+class ActivityTail:
+    """Streams new activities of many sessions as they arrive.
+
+    Every session is polled on its own clock through an ActivitySync: the
+    interval snaps to `min_interval` when a sync brings something new and
+    grows by `backoff` per empty sync up to `max_interval`, so active
+    sessions are followed closely while idle ones cost almost nothing.
+    A session drops out once its final activity has been seen.
+    """
+
+    def __init__(self, sync: ActivitySync, min_interval: float = 5.0,
+                 max_interval: float = 300.0, backoff: float = 1.5):
+        self.sync = sync
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    def _finished(self, session: Dict[str, Any]) -> bool:
+        cursor = self.sync.store.activity_cursor(session["sessionId"])
+        return bool(cursor and cursor["done"])
+
+    async def run(self, sessions: List[Dict[str, Any]],
+                  emit: Callable[[Dict[str, Any], Dict[str, Any]], None],
+                  max_wait: Optional[float] = None) -> int:
+        """Tails `sessions`, calling emit(session, activity) for each new one. Returns how many."""
+        semaphore = asyncio.Semaphore(self.sync.concurrency)
+        emitted = 0
+
+        async def follow(i: int, session: Dict[str, Any]):
+            nonlocal emitted
+            interval = self.min_interval
+            while True:
+                async with semaphore:
+                    try:
+                        new = await self.sync.sync(self.sync.key_for(session, i), session["sessionId"])
+                    except JulesAPIError as e:
+                        print(f"❌ Error syncing activities of {session['sessionId']}: {e}")
+                        new = []
+                for activity in new:
+                    emit(session, activity)
+                emitted += len(new)
+                if await asyncio.to_thread(self._finished, session):
+                    return
+                interval = self.min_interval if new else min(self.max_interval, interval * self.backoff)
+                await asyncio.sleep(interval)
+
+        followers = [asyncio.create_task(follow(i, s)) for i, s in enumerate(sessions)]
+        try:
+            if followers:
+                await asyncio.wait(followers, timeout=max_wait)
+        finally:
+            for task in followers:
+                task.cancel()
+            await asyncio.gather(*followers, return_exceptions=True)
+        return emitted
+
+
+def sync_activities(config: SwarmConfig, store: SessionStore, sessions: List[Dict[str, Any]],
+                    concurrency: int = 16) -> SyncResult:
+    """Blocking helper for runners: syncs `sessions` with a fresh pooled client."""
+    async def run():
+        async with client_from_config(config, pool_size=concurrency) as api:
+            return await ActivitySync(api, store, config.api_keys, concurrency).sync_many(sessions)
+
+    return asyncio.run(run())
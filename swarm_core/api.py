@@ -1,115 +1,418 @@
-import requests
+import asyncio
+import atexit
+import threading
 import time
-from typing import Dict, Any, Optional
+from typing import AsyncIterator, Dict, Any, Iterator, List, Optional
 
-class JulesAPI:
-    def __init__(self, base_url: str):
-        self.base_url = base_url
-        self._source_cache = {}
+import aiohttp
 
-    def get_source_name(self, api_key: str, repo_name: str) -> Optional[str]:
-        """Fetches the Jules Source Name for a given GitHub repo."""
-        cache_key = f"{api_key}:{repo_name}"
-        if cache_key in self._source_cache:
-            return self._source_cache[cache_key]
+from .config import SwarmConfig
+from .metrics import METRICS, Metrics, current_retry, endpoint_of, metrics_from_config
+from .retry import CircuitBreakers, RetryPolicy, parse_retry_after
+from .scheduler import KeyScheduler, Reservation
+from .sources import SourceCache
+
+
+class JulesAPIError(Exception):
+    """Raised by AsyncJulesAPI when a request fails or returns a non-2xx status."""
+
+    def __init__(self, message: str, status: Optional[int] = None,
+                 body: Any = None, retry_after: Optional[float] = None,
+                 sent: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+        self.retry_after = retry_after
+        # False when the request provably never reached the API
+        self.sent = sent
+
+
+class CircuitOpenError(JulesAPIError):
+    """Raised without calling the API while a key/endpoint circuit is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message, status=503, retry_after=retry_after, sent=False)
+
+
+class KeyDisabledError(JulesAPIError):
+    """Raised without calling the API once the scheduler has disabled the key (401/403)."""
+
+    def __init__(self, message: str):
+        super().__init__(message, status=403, sent=False)
+
+
+def _session_path(session_id: str) -> str:
+    if not session_id.startswith("sessions/"):
+        session_id = f"sessions/{session_id}"
+    return session_id
+
+
+class AsyncJulesAPI:
+    """Async Jules client with one keep-alive connection pool per API key."""
 
-        headers = {"x-goog-api-key": api_key}
-        url = f"{self.base_url}/sources"
+    def __init__(self, base_url: str, pool_size: int = 32,
+                 timeout: float = 30.0, keepalive: float = 60.0,
+                 scheduler: Optional[KeyScheduler] = None,
+                 source_cache: Optional[SourceCache] = None,
+                 metrics: Optional[Metrics] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakers] = None):
+        self.base_url = base_url.rstrip("/")
+        self.scheduler = scheduler
+        self.metrics = metrics if metrics is not None else METRICS
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.breakers = breakers if breakers is not None else CircuitBreakers()
+        self.source_cache = source_cache if source_cache is not None else SourceCache()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keepalive = keepalive
+        self._clients: Dict[str, aiohttp.ClientSession] = {}
 
+    def _client(self, api_key: str) -> aiohttp.ClientSession:
+        client = self._clients.get(api_key)
+        if client is None or client.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=self.keepalive)
+            client = aiohttp.ClientSession(
+                connector=connector,
+                headers={"x-goog-api-key": api_key},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._clients[api_key] = client
+        return client
+
+    async def _request(self, api_key: str, method: str, path: str,
+                       json: Optional[Dict[str, Any]] = None,
+                       params: Optional[Dict[str, Any]] = None,
+                       idempotent: Optional[bool] = None,
+                       reservation: Optional[Reservation] = None,
+                       retry: bool = True) -> Dict[str, Any]:
+        """Sends a request under the retry policy and the key/endpoint circuit breaker.
+
+        POSTs are treated as non-idempotent unless `idempotent` says otherwise.
+        A scheduler `reservation` is consumed by the first attempt; retries
+        only spend tokens. The caller still releases it if nothing was sent.
+        `retry=False` makes a single attempt, for callers that retry themselves.
+        """
+        if idempotent is None:
+            idempotent = method != "POST"
+        endpoint = endpoint_of(path)
+        breaker = self.breakers.get(api_key, endpoint)
+        outer_retries = current_retry.get()
+        attempt = 0
+        while True:
+            wait = breaker.check()
+            if wait is not None:
+                raise CircuitOpenError(f"{method} {path}: circuit open for {endpoint}, retry in {wait:.0f}s", wait)
+            attempt += 1
+            try:
+                result = await self._send(api_key, method, path, json, params, outer_retries + attempt - 1,
+                                          reservation if attempt == 1 else None)
+            except JulesAPIError as e:
+                if e.status is not None and e.status < 500:
+                    breaker.success()  # the endpoint answered; 429s are the scheduler's business
+                elif breaker.failure():
+                    print(f"🔌 Circuit opened for {endpoint} on key #{self._key_label(api_key)} "
+                          f"after {breaker.failures} failures.")
+                delay = self.retry_policy.next_delay(attempt, e.status, e.sent, idempotent,
+                                                     e.retry_after) if retry else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            breaker.success()
+            return result
+
+    def _key_label(self, api_key: str) -> str:
+        return str(self.scheduler.index_of(api_key) + 1) if self.scheduler else "?"
+
+    async def _send(self, api_key: str, method: str, path: str,
+                    json: Optional[Dict[str, Any]], params: Optional[Dict[str, Any]],
+                    retry: int, reservation: Optional[Reservation] = None) -> Dict[str, Any]:
+        """One attempt, paced by the scheduler and reported to it and to metrics."""
+        url = f"{self.base_url}/{path}"
+        queued = time.monotonic()
+        if self.scheduler and not await self.scheduler.throttle(api_key, reservation):
+            raise KeyDisabledError(f"{method} {path}: key #{self._key_label(api_key)} is disabled")
+
+        started = time.monotonic()
+        status: Optional[int] = None
+        retry_after: Optional[float] = None
         try:
-            resp = requests.get(url, headers=headers)
-            resp.raise_for_status()
-            data = resp.json()
+            async with self._client(api_key).request(method, url, json=json, params=params) as resp:
+                status = resp.status
+                if resp.status >= 400:
+                    retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+                    try:
+                        body = await resp.json(content_type=None)
+                    except (ValueError, aiohttp.ClientError):
+                        body = None
+                    raise JulesAPIError(
+                        f"{method} {path} returned HTTP {resp.status}",
+                        status=resp.status,
+                        body=body,
+                        retry_after=retry_after,
+                    )
+                data = await resp.json(content_type=None)
+                return data if data is not None else {}
+        except aiohttp.ClientConnectorError as e:
+            raise JulesAPIError(f"{method} {path} failed: {e}", sent=False) from e
+        except aiohttp.ClientError as e:
+            raise JulesAPIError(f"{method} {path} failed: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise JulesAPIError(f"{method} {path} timed out after {self.timeout}s") from e
+        finally:
+            latency = time.monotonic() - started
+            key_index = None
+            if self.scheduler:
+                self.scheduler.record(api_key, status, latency, retry_after)
+                key_index = self.scheduler.index_of(api_key)
+            self.metrics.request(method, path, key_index, status, latency, wait=started - queued, retry=retry)
 
+    async def list_sources(self, api_key: str, page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yields every source visible to the key, following nextPageToken."""
+        params: Dict[str, Any] = {"pageSize": page_size}
+        while True:
+            data = await self._request(api_key, "GET", "sources", params=params)
             for source in data.get("sources", []):
-                gh_repo = source.get("githubRepo", {})
-                full_name = f"{gh_repo.get('owner')}/{gh_repo.get('repo')}"
-                if full_name.lower() == repo_name.lower():
-                    self._source_cache[cache_key] = source['name']
-                    return source['name']
-            
-            return None
+                yield source
+            token = data.get("nextPageToken")
+            if not token:
+                return
+            params = {"pageSize": page_size, "pageToken": token}
+
+    async def get_source_name(self, api_key: str, repo_name: str) -> Optional[str]:
+        """Fetches the Jules Source Name for a given GitHub repo."""
+        cached = self.source_cache.get(api_key, repo_name)
+        if cached:
+            return cached
+
+        found = None
+        async for source in self.list_sources(api_key):
+            gh_repo = source.get("githubRepo", {})
+            full_name = f"{gh_repo.get('owner')}/{gh_repo.get('repo')}"
+            # Remember every repo we page past, not just the one we asked for
+            self.source_cache.put(api_key, full_name, source['name'])
+            if full_name.lower() == repo_name.lower():
+                found = source['name']
+                break
+        self.source_cache.save()
+        return found
+
+    async def warm_sources(self, api_keys: List[str], repo_name: str) -> Dict[str, Optional[str]]:
+        """Resolves the source for every key in parallel. Failures map to None."""
+        async def resolve(api_key):
+            try:
+                return await self.get_source_name(api_key, repo_name)
+            except JulesAPIError as e:
+                print(f"❌ API Error listing sources: {e}")
+                return None
+
+        names = await asyncio.gather(*(resolve(k) for k in api_keys))
+        return dict(zip(api_keys, names))
+
+    async def create_session(self, api_key: str, payload: Dict[str, Any],
+                             reservation: Optional[Reservation] = None, retry: bool = True) -> Dict[str, Any]:
+        """Creates a new Jules session."""
+        return await self._request(api_key, "POST", "sessions", json=payload,
+                                   reservation=reservation, retry=retry)
+
+    async def list_sessions_page(self, api_key: str, page_size: int = 100,
+                                 page_token: Optional[str] = None) -> Dict[str, Any]:
+        """Fetches one page of the key's sessions ({"sessions": [...], "nextPageToken": ...})."""
+        params: Dict[str, Any] = {"pageSize": page_size}
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._request(api_key, "GET", "sessions", params=params)
+
+    async def list_sessions(self, api_key: str, page_size: int = 100,
+                            max_pages: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yields the key's sessions (newest first), following nextPageToken."""
+        token, pages = None, 0
+        while max_pages is None or pages < max_pages:
+            page = await self.list_sessions_page(api_key, page_size, token)
+            pages += 1
+            for session in page.get("sessions", []):
+                yield session
+            token = page.get("nextPageToken")
+            if not token:
+                return
+
+    async def list_activities_page(self, api_key: str, session_id: str, page_size: int = 100,
+                                   page_token: Optional[str] = None) -> Dict[str, Any]:
+        """Fetches one page of a session's activities ({"activities": [...], "nextPageToken": ...})."""
+        params: Dict[str, Any] = {"pageSize": page_size}
+        if page_token:
+            params["pageToken"] = page_token
+        return await self._request(api_key, "GET", f"{_session_path(session_id)}/activities", params=params)
+
+    async def list_activities(self, api_key: str, session_id: str,
+                              page_size: int = 100) -> AsyncIterator[Dict[str, Any]]:
+        """Yields a session's activities (oldest first), following nextPageToken."""
+        token = None
+        while True:
+            page = await self.list_activities_page(api_key, session_id, page_size, token)
+            for activity in page.get("activities", []):
+                yield activity
+            token = page.get("nextPageToken")
+            if not token:
+                return
 
-        except requests.exceptions.RequestException as e:
+    async def get_session_details(self, api_key: str, session_id: str,
+                                  reservation: Optional[Reservation] = None) -> Dict[str, Any]:
+        """Fetches session details from Jules API."""
+        return await self._request(api_key, "GET", _session_path(session_id), reservation=reservation)
+
+    async def get_session_resource(self, api_key: str, session_id: str, resource: str) -> Dict[str, Any]:
+        """Fetches a specific resource (history, turns, etc) for a session."""
+        return await self._request(api_key, "GET", f"{_session_path(session_id)}/{resource}")
+
+    async def send_input(self, api_key: str, session_id: str, text: str) -> Dict[str, Any]:
+        """Sends text input to a session."""
+        payload = {"input": {"text": text}}
+        return await self._request(api_key, "POST", f"{_session_path(session_id)}:sendInput", json=payload)
+
+    async def approve_plan(self, api_key: str, session_id: str) -> Dict[str, Any]:
+        """Approves the plan of a session waiting in AWAITING_PLAN_APPROVAL."""
+        return await self._request(api_key, "POST", f"{_session_path(session_id)}:approvePlan", json={},
+                                   idempotent=True)
+
+    async def close(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            await client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+def client_from_config(config: SwarmConfig, pool_size: int = 32) -> AsyncJulesAPI:
+    """Builds the standard client: per-key scheduling plus the persistent source cache."""
+    scheduler = KeyScheduler(config.api_keys, rate=config.key_rate, burst=config.key_burst)
+    source_cache = SourceCache(config.state_dir / "source_cache.json", ttl=config.source_cache_ttl)
+    return AsyncJulesAPI(config.api_base_url, pool_size=pool_size, scheduler=scheduler,
+                         source_cache=source_cache, metrics=metrics_from_config(config),
+                         retry_policy=RetryPolicy.from_config(config),
+                         breakers=CircuitBreakers.from_config(config))
+
+
+class JulesAPI:
+    """Blocking facade over AsyncJulesAPI for the existing runners.
+
+    Calls run on a private event-loop thread so the per-key connection
+    pools survive between calls. Errors are printed and reported as None.
+    """
+
+    def __init__(self, base_url: str, **client_options):
+        self.base_url = base_url
+        self.client = AsyncJulesAPI(base_url, **client_options)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _run(self, coro):
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="jules-api", daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.client.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    @staticmethod
+    def _print_body(e: JulesAPIError):
+        if e.body is not None:
+            print(e.body)
+
+    def get_source_name(self, api_key: str, repo_name: str) -> Optional[str]:
+        """Fetches the Jules Source Name for a given GitHub repo."""
+        try:
+            return self._run(self.client.get_source_name(api_key, repo_name))
+        except JulesAPIError as e:
             print(f"❌ API Error listing sources: {e}")
             return None
 
     def create_session(self, api_key: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Creates a new Jules session."""
-        headers = {
-            "x-goog-api-key": api_key,
-            "Content-Type": "application/json"
-        }
-        url = f"{self.base_url}/sessions"
-
         try:
-            resp = requests.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.exceptions.RequestException as e:
-            # Simple retry logic could be added here if needed, but handled by caller usually
+            return self._run(self.client.create_session(api_key, payload))
+        except JulesAPIError as e:
             print(f"❌ Error creating session: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    print(e.response.json())
-                except:
-                    pass
+            self._print_body(e)
             return None
 
     def get_session_details(self, api_key: str, session_id: str) -> Optional[Dict[str, Any]]:
         """Fetches session details from Jules API."""
-        if not session_id.startswith("sessions/"):
-            session_id = f"sessions/{session_id}"
-            
-        headers = {"x-goog-api-key": api_key}
-        url = f"{self.base_url}/{session_id}"
-        
         try:
-            resp = requests.get(url, headers=headers)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching session {session_id}: {e}")
+            return self._run(self.client.get_session_details(api_key, session_id))
+        except JulesAPIError as e:
+            print(f"❌ Error fetching session {_session_path(session_id)}: {e}")
             return None
 
+    def list_sessions(self, api_key: str, page_size: int = 100,
+                      max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yields the key's sessions page by page; stops early (with a message) on an error."""
+        token, pages = None, 0
+        while max_pages is None or pages < max_pages:
+            try:
+                page = self._run(self.client.list_sessions_page(api_key, page_size, token))
+            except JulesAPIError as e:
+                print(f"❌ Error listing sessions: {e}")
+                return
+            pages += 1
+            yield from page.get("sessions", [])
+            token = page.get("nextPageToken")
+            if not token:
+                return
+
+    def list_activities(self, api_key: str, session_id: str, page_size: int = 100) -> Iterator[Dict[str, Any]]:
+        """Yields a session's activities page by page; stops early (with a message) on an error."""
+        token = None
+        while True:
+            try:
+                page = self._run(self.client.list_activities_page(api_key, session_id, page_size, token))
+            except JulesAPIError as e:
+                print(f"❌ Error listing activities of {_session_path(session_id)}: {e}")
+                return
+            yield from page.get("activities", [])
+            token = page.get("nextPageToken")
+            if not token:
+                return
+
     def get_session_resource(self, api_key: str, session_id: str, resource: str) -> Optional[Dict[str, Any]]:
         """Fetches a specific resource (history, turns, etc) for a session."""
-        if not session_id.startswith("sessions/"):
-            session_id = f"sessions/{session_id}"
-            
-        headers = {"x-goog-api-key": api_key}
-        url = f"{self.base_url}/{session_id}/{resource}"
-        
         try:
-            resp = requests.get(url, headers=headers)
-            if resp.status_code == 200:
-                return resp.json()
-            return None
-        except Exception:
+            return self._run(self.client.get_session_resource(api_key, session_id, resource))
+        except JulesAPIError:
             return None
 
     def send_input(self, api_key: str, session_id: str, text: str) -> Optional[Dict[str, Any]]:
         """Sends text input to a session."""
-        if not session_id.startswith("sessions/"):
-            session_id = f"sessions/{session_id}"
-
-        headers = {
-            "x-goog-api-key": api_key,
-            "Content-Type": "application/json"
-        }
-        url = f"{self.base_url}/{session_id}:sendInput"
-        
-        payload = {"input": {"text": text}}
-        
         try:
-            resp = requests.post(url, headers=headers, json=payload)
-            resp.raise_for_status()
-            return resp.json()
-        except requests.exceptions.RequestException as e:
+            return self._run(self.client.send_input(api_key, session_id, text))
+        except JulesAPIError as e:
             print(f"❌ Error sending input: {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                try:
-                    print(e.response.json())
-                except:
-                    pass
+            self._print_body(e)
+            return None
+
+    def approve_plan(self, api_key: str, session_id: str) -> Optional[Dict[str, Any]]:
+        """Approves the plan of a session waiting in AWAITING_PLAN_APPROVAL."""
+        try:
+            return self._run(self.client.approve_plan(api_key, session_id))
+        except JulesAPIError as e:
+            print(f"❌ Error approving plan: {e}")
+            self._print_body(e)
             return None
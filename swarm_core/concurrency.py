@@ -0,0 +1,143 @@
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from .config import SwarmConfig
+from .files import atomic_write_json
+from .sources import key_fingerprint
+
+# Outcomes that mean the service is pushing back: throttled, overloaded or unreachable
+BACKOFF_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AIMDLimit:
+    """Additive-increase / multiplicative-decrease in-flight limit for one key.
+
+    Every healthy completion while the limit is in use grows it by
+    `increase / limit` (about +`increase` per full window); a throttle,
+    server error or a response slower than `tolerance` x the latency
+    baseline cuts it by `decrease`. Requests started before a cut cannot
+    cut it again, so one burst of 429s only halves the limit once.
+    """
+
+    def __init__(self, initial: float = 2.0, min_limit: float = 1.0, max_limit: float = 16.0,
+                 increase: float = 1.0, decrease: float = 0.5, tolerance: float = 2.0,
+                 alpha: float = 0.1, baseline: Optional[float] = None):
+        self.min_limit = min_limit
+        self.max_limit = max(min_limit, max_limit)
+        self.limit = min(self.max_limit, max(min_limit, float(initial)))
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.alpha = alpha
+        self.baseline = baseline  # EWMA of successful latencies (seconds)
+        self.in_flight = 0
+        self.epoch = 0  # bumped on every cut
+
+    def has_capacity(self) -> bool:
+        return self.in_flight < int(self.limit)
+
+    def start(self) -> int:
+        self.in_flight += 1
+        return self.epoch
+
+    def end(self):
+        if self.in_flight > 0:
+            self.in_flight -= 1
+
+    def observe(self, ticket: int, status: Optional[int], latency: float) -> Optional[str]:
+        """Feeds back one completion. Returns "increase", "decrease" or None."""
+        if status is None or status in BACKOFF_STATUSES:
+            return self._cut(ticket)
+        if status >= 400:
+            return None  # the request was bad, not the service
+
+        slow = self.baseline is not None and latency > self.baseline * self.tolerance
+        self.baseline = latency if self.baseline is None else (1 - self.alpha) * self.baseline + self.alpha * latency
+        if slow:
+            return self._cut(ticket)
+        # Only grow while the limit is actually the bottleneck, or it drifts up on idle keys
+        if self.in_flight >= int(self.limit) and self.limit < self.max_limit:
+            self.limit = min(self.max_limit, self.limit + self.increase / self.limit)
+            return "increase"
+        return None
+
+    def _cut(self, ticket: int) -> Optional[str]:
+        if ticket < self.epoch:
+            return None
+        self.epoch += 1
+        previous = self.limit
+        self.limit = max(self.min_limit, self.limit * self.decrease)
+        return "decrease" if self.limit < previous else None
+
+
+class ConcurrencyController:
+    """Per-key AIMD limits on requests in flight, persisted between runs.
+
+    Layout on disk: {fingerprint: {"limit": ..., "baseline": ..., "updatedAt": epoch}}.
+    Pass `path=None` to start from `initial` every run.
+    """
+
+    def __init__(self, keys: List[str], initial: float = 2.0, min_limit: float = 1.0,
+                 max_limit: float = 16.0, path: Optional[Union[str, Path]] = None):
+        self.path = Path(path) if path else None
+        saved = self._read()
+        self._limits: Dict[str, AIMDLimit] = {}
+        for key in keys:
+            state = saved.get(key_fingerprint(key), {})
+            self._limits[key] = AIMDLimit(initial=state.get("limit", initial), min_limit=min_limit,
+                                          max_limit=max_limit, baseline=state.get("baseline"))
+
+    @classmethod
+    def from_config(cls, config: SwarmConfig, max_limit: Optional[float] = None) -> "ConcurrencyController":
+        ceiling = config.concurrency_max if max_limit is None else min(max_limit, config.concurrency_max)
+        return cls(config.api_keys, initial=config.concurrency_initial, max_limit=ceiling,
+                   path=config.state_dir / "concurrency.json")
+
+    def _read(self) -> Dict[str, Dict]:
+        if not self.path or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            print(f"⚠️  Ignoring unreadable concurrency state at {self.path}")
+            return {}
+
+    def has_capacity(self, api_key: str) -> bool:
+        limit = self._limits.get(api_key)
+        return limit is None or limit.has_capacity()
+
+    def start(self, api_key: str) -> int:
+        limit = self._limits.get(api_key)
+        return limit.start() if limit else 0
+
+    def end(self, api_key: str):
+        limit = self._limits.get(api_key)
+        if limit:
+            limit.end()
+
+    def observe(self, api_key: str, ticket: int, status: Optional[int], latency: float) -> Optional[str]:
+        limit = self._limits.get(api_key)
+        return limit.observe(ticket, status, latency) if limit else None
+
+    def limit_of(self, api_key: str) -> float:
+        return self._limits[api_key].limit
+
+    def limits(self) -> List[float]:
+        return [round(limit.limit, 2) for limit in self._limits.values()]
+
+    def save(self):
+        """Writes every key's current limit atomically, keeping other keys' entries."""
+        if not self.path:
+            return
+        merged = self._read()
+        now = time.time()
+        for key, limit in self._limits.items():
+            merged[key_fingerprint(key)] = {"limit": round(limit.limit, 3),
+                                            "baseline": round(limit.baseline, 4) if limit.baseline else None,
+                                            "updatedAt": now}
+
+        atomic_write_json(self.path, merged)
@@ -2,6 +2,13 @@ import os
 from pathlib import Path
 from typing import List, Optional
 
+# The research/ checkout; relative state paths resolve here, not against the cwd
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+def _package_path(value: str) -> Path:
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else PACKAGE_ROOT / path
+
 class SwarmConfig:
     def __init__(self, env_path: str = ".env"):
         self.env_path = Path(env_path)
@@ -52,6 +59,77 @@ class SwarmConfig:
             raise ValueError("No JULES_API_KEYS found in environment or .env file.")
         return self.api_keys[index % len(self.api_keys)]
 
+    @property
+    def key_rate(self) -> float:
+        """Sustained requests per second allowed per API key."""
+        return float(os.environ.get("JULES_KEY_RPS", "1.0"))
+
+    @property
+    def key_burst(self) -> float:
+        """Requests a single idle API key may burst before pacing kicks in."""
+        return float(os.environ.get("JULES_KEY_BURST", "5"))
+
+    @property
+    def state_dir(self) -> Path:
+        """Directory for persistent swarm state (caches, session store, journals).
+
+        Defaults to research/state; a relative JULES_STATE_DIR is taken
+        relative to research/ so every runner and component agrees on it
+        wherever the process was started.
+        """
+        return _package_path(os.environ.get("JULES_STATE_DIR", "state"))
+
+    @property
+    def source_cache_ttl(self) -> float:
+        """Seconds a cached repo -> source mapping stays valid."""
+        return float(os.environ.get("JULES_SOURCE_TTL", str(24 * 3600)))
+
+    @property
+    def retry_attempts(self) -> int:
+        """Attempts per API request, including the first."""
+        return int(os.environ.get("JULES_RETRY_ATTEMPTS", "4"))
+
+    @property
+    def retry_base_delay(self) -> float:
+        """First backoff ceiling in seconds; doubles on every retry."""
+        return float(os.environ.get("JULES_RETRY_BASE", "0.5"))
+
+    @property
+    def retry_max_delay(self) -> float:
+        return float(os.environ.get("JULES_RETRY_MAX", "30"))
+
+    @property
+    def breaker_threshold(self) -> int:
+        """Consecutive failures on one key/endpoint that open its circuit."""
+        return int(os.environ.get("JULES_BREAKER_THRESHOLD", "5"))
+
+    @property
+    def breaker_reset(self) -> float:
+        """Seconds an open circuit waits before letting a probe through."""
+        return float(os.environ.get("JULES_BREAKER_RESET", "30"))
+
+    @property
+    def concurrency_initial(self) -> float:
+        """Per-key in-flight limit to start from when no state is saved yet."""
+        return float(os.environ.get("JULES_CONCURRENCY_INITIAL", "2"))
+
+    @property
+    def concurrency_max(self) -> float:
+        """Ceiling for the adaptive per-key in-flight limit."""
+        return float(os.environ.get("JULES_CONCURRENCY_MAX", "16"))
+
+    @property
+    def metrics_file(self) -> Optional[Path]:
+        """JSONL file receiving one event per API request and stage span (unset = off)."""
+        value = os.environ.get("JULES_METRICS_FILE")
+        return _package_path(value) if value else None
+
+    @property
+    def metrics_port(self) -> Optional[int]:
+        """Port for a Prometheus text endpoint (unset = off)."""
+        value = os.environ.get("JULES_METRICS_PORT")
+        return int(value) if value else None
+
     @property
     def api_base_url(self) -> str:
         return os.environ.get("JULES_API_BASE", "https://jules.googleapis.com/v1alpha")
@@ -0,0 +1,31 @@
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Union
+
+
+def atomic_write(path: Union[str, Path], data: Union[str, bytes]) -> None:
+    """Writes `data` to a temp file next to `path`, fsyncs it, then renames it into place.
+
+    Readers see either the old file or the new one, never a partial write.
+    Text is encoded as UTF-8; missing parent directories are created.
+    """
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def atomic_write_json(path: Union[str, Path], value: Any) -> None:
+    atomic_write(path, json.dumps(value, indent=2))
@@ -0,0 +1,95 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .files import atomic_write
+
+# Journal phases. "intent" is written (and fsynced) before create_session is
+# called; one of the others follows once we know what happened.
+INTENT = "intent"
+DONE = "done"
+FAILED = "failed"
+UNKNOWN = "unknown"
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def parse_time(value: Optional[str]) -> Optional[datetime]:
+    """Parses RFC 3339 timestamps as returned by the API (nanoseconds, trailing Z)."""
+    if not value:
+        return None
+    value = re.sub(r"(\.\d{6})\d+", r"\1", value.replace("Z", "+00:00"))
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class DispatchJournal:
+    """Write-ahead log of one dispatch run, as append-only JSONL.
+
+    Replaying it tells a restarted launcher which tasks already have a
+    session (`done`), which definitely do not (`failed`), and which were in
+    flight when the process died (`intent`/`unknown`) and must be reconciled
+    against the API before they can be sent again. A run that finishes with
+    nothing unresolved clears the journal.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = None
+
+    def _append(self, entry: Dict[str, Any]):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def replay(self) -> Dict[str, Dict[str, Any]]:
+        """Returns the latest entry per task id. A torn final line is ignored."""
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not self.path.exists():
+            return entries
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                previous = entries.get(entry["task"], {})
+                entries[entry["task"]] = {**previous, **entry}
+        return entries
+
+    def intent(self, task_id: str, key_index: int, title: str):
+        self._append({"task": task_id, "phase": INTENT, "keyIndex": key_index, "title": title, "ts": utc_now()})
+
+    def done(self, task_id: str, session_id: str, key_index: int):
+        self._append({"task": task_id, "phase": DONE, "sessionId": session_id, "keyIndex": key_index, "ts": utc_now()})
+
+    def failed(self, task_id: str, reason: str):
+        self._append({"task": task_id, "phase": FAILED, "reason": reason, "ts": utc_now()})
+
+    def unknown(self, task_id: str, reason: str):
+        self._append({"task": task_id, "phase": UNKNOWN, "reason": reason, "ts": utc_now()})
+
+    def compact(self, keep: List[Dict[str, Any]]):
+        """Atomically rewrites the journal with only `keep` (latest entries)."""
+        self.close()
+        if not keep:
+            if self.path.exists():
+                self.path.unlink()
+            return
+        atomic_write(self.path, "".join(json.dumps(entry) + "\n" for entry in keep))
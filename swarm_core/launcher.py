@@ -1,90 +1,492 @@
+import asyncio
 import time
 import sys
-from typing import Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 from .config import SwarmConfig
-from .api import JulesAPI
-from .providers import TaskProvider
+from .api import AsyncJulesAPI, JulesAPIError, client_from_config
+from .concurrency import ConcurrencyController
+from .state import SessionStore, open_session_store
+from .journal import DispatchJournal, DONE, FAILED, INTENT, UNKNOWN, parse_time
+from .metrics import current_retry
+from .retry import NOT_PROCESSED_STATUSES
+from .prompt_store import PromptStore, prompt_hash
+from .providers import Task, TaskProvider
 from .prompts import PromptBuilder
+from .scheduler import Reservation
+
+# Statuses that mean "slow down and try again" rather than "this task failed"
+THROTTLE_STATUSES = {429, 503}
+
+# Sessions in these states did not do the work, so their prompt may be sent again
+REDISPATCHABLE_STATES = ("FAILED", "CANCELLED")
+
+# Allowed clock skew between our journal timestamps and the API's createTime
+RECONCILE_SKEW = timedelta(minutes=5)
 
 class SwarmLauncher:
-    def __init__(self, 
-                 config: SwarmConfig, 
-                 provider: TaskProvider, 
+    def __init__(self,
+                 config: SwarmConfig,
+                 provider: TaskProvider,
                  prompt_builder: PromptBuilder,
                  repo_name: str,
                  concurrency: int = 1,
-                 dry_run: bool = False):
-        
+                 dry_run: bool = False,
+                 max_attempts: int = 5,
+                 store: Optional[SessionStore] = None,
+                 batch_size: Optional[int] = None,
+                 component_prefix: str = "",
+                 journal: Optional[DispatchJournal] = None,
+                 reconcile_pages: int = 20,
+                 prompt_store: Optional[PromptStore] = None,
+                 dedupe: bool = True,
+                 limit: int = 0,
+                 api: Optional[AsyncJulesAPI] = None,
+                 adaptive: bool = True,
+                 controller: Optional[ConcurrencyController] = None):
+
         self.config = config
         self.provider = provider
         self.prompt_builder = prompt_builder
         self.repo_name = repo_name
-        self.concurrency = concurrency
+        self.concurrency = max(1, concurrency)
         self.dry_run = dry_run
-        
-        self.api = JulesAPI(config.api_base_url)
+        self.max_attempts = max_attempts
+        self.limit = limit
+
+        # A client passed in belongs to the caller (e.g. a pipeline sharing it across stages)
+        self._owns_api = api is None
+        self.api = api if api is not None else client_from_config(config, pool_size=self.concurrency)
+        self.scheduler = self.api.scheduler
+        self.metrics = self.api.metrics
+
+        # `concurrency` caps the workers; below it each key's in-flight limit adapts (AIMD)
+        self.controller = controller
+        if self.controller is None and adaptive and not dry_run:
+            self.controller = ConcurrencyController.from_config(config, max_limit=self.concurrency)
+
+        self.store = store
+        self.batch_size = batch_size or self.concurrency
+        self.component_prefix = component_prefix
+        self._pending_records: List[Dict[str, Any]] = []
+        self._pending_tasks: List[Task] = []
+        # Tasks whose create_session outcome is unknown this run: task id -> (task, title, prompt digest)
+        self._unsettled: Dict[str, Tuple[Task, str, str]] = {}
+
+        self.journal = journal
+        self.reconcile_pages = reconcile_pages
+
+        self.prompt_store = prompt_store
+        self.dedupe = dedupe
+        self._claimed_prompts: Dict[str, str] = {}
+
+        self._sources: Dict[str, Optional[str]] = {}
+        self._source_locks: Dict[str, asyncio.Lock] = {}
 
     def run(self):
+        if asyncio.run(self.run_async()) is None:
+            sys.exit(10) # 10 = No tasks code
+
+    async def run_async(self) -> Optional[Dict[str, int]]:
+        """Dispatches pending tasks on the running loop. Returns the stats, or None if there were no tasks."""
         print(f"🚀 Starting Swarm Launcher for {self.repo_name}")
-        tasks = self.provider.get_tasks()
+        tasks = self.provider.get_tasks(limit=self.limit)
         print(f"📋 Found {len(tasks)} tasks.")
-        
+
         if not tasks:
             print("✅ No tasks found. Exiting.")
-            sys.exit(10) # 10 = No tasks code
+            if self._owns_api:
+                await self.api.close()
+            return None
 
-        active_count = 0
-        
-        for i, task in enumerate(tasks):
-            # Key Rotation
-            current_key = self.config.get_api_key(i)
-            
-            # Resolve Source ID
-            if self.dry_run:
-                source_name = "projects/mock/sources/mock"
-            else:
-                source_name = self.api.get_source_name(current_key, self.repo_name)
-                if not source_name:
-                    print(f"⏭️ Skipping task {task.id} due to source error.")
-                    continue
-
-            print(f"\n[{i+1}/{len(tasks)}] Processing: {task.description} (Key #{i % len(self.config.api_keys) + 1})")
-            
-            # Build Prompt
-            context = {"component_name": task.id} # default
-            if task.metadata:
-                context.update(task.metadata)
-                
-            prompt = self.prompt_builder.build(context)
-            
-            # Create Session
-            payload = {
-                "prompt": prompt,
-                "sourceContext": {
-                    "source": source_name,
-                    "githubRepoContext": { "startingBranch": "main" } 
-                },
-                "automationMode": "AUTO_CREATE_PR",
-                "title": f"Task: {task.id}"
-            }
-
-            if self.dry_run:
-                print(f"[DRY-RUN] Would create session for {task.id}")
-                print(f"[DRY-RUN] Prompt Preview: {prompt[:100]}...")
+        if not self.dry_run:
+            if self.store is None:
+                self.store = open_session_store(self.config.state_dir)
+            if self.journal is None:
+                slug = self.repo_name.replace("/", "__")
+                self.journal = DispatchJournal(self.config.state_dir / "journals" / f"{slug}.jsonl")
+            if self.prompt_store is None:
+                self.prompt_store = PromptStore(self.store.path.parent / "prompts")
+
+        await self._dispatch_all(tasks)
+        return self.stats
+
+    async def _dispatch_all(self, tasks):
+        total = len(tasks)
+        self.stats = {"dispatched": 0, "failed": 0, "skipped": 0, "throttled": 0,
+                      "resumed": 0, "unknown": 0, "duplicates": 0}
+        self.timings = {"key_wait": 0.0, "api": 0.0}
+        self._unsettled = {}
+        started = time.monotonic()
+
+        if not self.dry_run:
+            # Warm every key's source up front so the first dispatch isn't stuck listing /sources
+            with self.metrics.span("launch.warm_sources", keys=len(self.config.api_keys)):
+                self._sources = await self.api.warm_sources(self.config.api_keys, self.repo_name)
+            missing = [i + 1 for i, k in enumerate(self.config.api_keys) if not self._sources.get(k)]
+            if missing:
+                print(f"⚠️  No source for {self.repo_name} on key(s) {missing}; will retry on demand.")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        workers = []
+        try:
+            if not self.dry_run:
+                with self.metrics.span("launch.resume"):
+                    tasks = await self._resume(tasks)
+            for i, task in enumerate(tasks):
+                queue.put_nowait((i, task, 1))
+
+            with self.metrics.span("launch.dispatch", tasks=len(tasks), concurrency=self.concurrency):
+                workers = [asyncio.create_task(self._worker(queue, len(tasks)))
+                           for _ in range(min(self.concurrency, len(tasks)))]
+                await queue.join()
+
+            if not self.dry_run:
+                with self.metrics.span("launch.finish_journal"):
+                    await self._finish_journal()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            if self._owns_api:
+                await self.api.close()
+            self._checkpoint()
+            if self.journal:
+                self.journal.close()
+            if self.controller:
+                self.controller.save()
+
+        elapsed = time.monotonic() - started
+        rate = self.stats["dispatched"] / elapsed if elapsed > 0 else 0.0
+        print("\n✅ Batch dispatch completed.")
+        print(f"📊 Dispatched {self.stats['dispatched']}/{total} in {elapsed:.1f}s "
+              f"({rate:.2f} sessions/s, concurrency {self.concurrency}). "
+              f"Failed: {self.stats['failed']}, skipped: {self.stats['skipped']}, "
+              f"duplicates: {self.stats['duplicates']}, throttled responses: {self.stats['throttled']}.")
+        if not self.dry_run:
+            print(f"⏱️  Summed over workers: {self.timings['key_wait']:.1f}s waiting for a key, "
+                  f"{self.timings['api']:.1f}s in create_session.")
+        if self.stats["resumed"] or self.stats["unknown"]:
+            print(f"♻️  Recovered {self.stats['resumed']} sessions from the journal; "
+                  f"{self.stats['unknown']} dispatches still unconfirmed.")
+        if not self.dry_run:
+            limits = self.controller.limits() if self.controller else []
+            for n, row in enumerate(self.scheduler.snapshot()):
+                print(f"   Key #{row['key']}: {row['ok']} ok, {row['throttled']} throttled, "
+                      f"{row['errors']} errors, avg {row['avg_latency']}s"
+                      + (f", in-flight limit {limits[n]}" if n < len(limits) else "")
+                      + (" (disabled)" if row['disabled'] else ""))
+
+    async def _worker(self, queue: asyncio.Queue, total: int):
+        while True:
+            i, task, attempt = await queue.get()
+            current_retry.set(attempt - 1)
+            try:
+                retry = await self._dispatch(i, task, attempt, total)
+                if retry:
+                    # Back off like the client would; the scheduler also cools the key down
+                    await asyncio.sleep(self.api.retry_policy.backoff(attempt))
+                    queue.put_nowait((i, task, attempt + 1))
+            except Exception as e:
+                print(f"❌ Unexpected error dispatching {task.id}: {e}")
+                self.stats["failed"] += 1
+            finally:
+                queue.task_done()
+
+    async def _resolve_source(self, api_key: str) -> Optional[str]:
+        if self._sources.get(api_key):
+            return self._sources[api_key]
+        lock = self._source_locks.setdefault(api_key, asyncio.Lock())
+        async with lock:
+            if not self._sources.get(api_key):
+                self._sources[api_key] = await self.api.get_source_name(api_key, self.repo_name)
+            return self._sources[api_key]
+
+    async def _dispatch(self, i: int, task: Task, attempt: int, total: int) -> bool:
+        """Dispatches a single task. Returns True if it should be retried."""
+        # Build Prompt
+        context = {"component_name": task.id} # default
+        if task.metadata:
+            context.update(task.metadata)
+
+        prompt = self.prompt_builder.build(context)
+        digest = prompt_hash(prompt)
+        if self.dedupe and self._is_duplicate(task, digest):
+            return False
+
+        if self.dry_run:
+            print(f"\n[{i+1}/{total}] Processing: {task.description} (dry-run)")
+            print(f"[DRY-RUN] Would create session for {task.id}")
+            print(f"[DRY-RUN] Prompt Preview: {prompt[:100]}...")
+            self.stats["dispatched"] += 1
+            return False
+
+        # Key Selection: the scheduler hands out the key with the most headroom,
+        # among those still under their adaptive in-flight limit
+        admit = self.controller.has_capacity if self.controller else None
+        waited = time.monotonic()
+        reservation = await self.scheduler.acquire(admit=admit)
+        current_key = reservation.key
+        waited = time.monotonic() - waited
+        self.timings["key_wait"] += waited
+        self.metrics.record_span("launch.acquire_key", waited, task=task.id)
+        ticket = self.controller.start(current_key) if self.controller else None
+        try:
+            return await self._dispatch_on_key(i, task, attempt, total, prompt, digest, reservation, ticket)
+        finally:
+            # No-op once create_session consumed it; otherwise hands the key back
+            reservation.release()
+            if self.controller:
+                self.controller.end(current_key)
+
+    async def _dispatch_on_key(self, i: int, task: Task, attempt: int, total: int, prompt: str,
+                               digest: str, reservation: Reservation, ticket: Optional[int]) -> bool:
+        current_key = reservation.key
+        key_label = f"Key #{self.scheduler.index_of(current_key) + 1}"
+        try:
+            # Source lookups already retry inside the client; a failure here is final
+            source_name = await self._resolve_source(current_key)
+        except JulesAPIError as e:
+            print(f"❌ API Error listing sources: {e}")
+            source_name = None
+        if not source_name:
+            print(f"⏭️ Skipping task {task.id} due to source error.")
+            self.stats["skipped"] += 1
+            return False
+
+        print(f"\n[{i+1}/{total}] Processing: {task.description} ({key_label})")
+
+        # Create Session
+        payload = {
+            "prompt": prompt,
+            "sourceContext": {
+                "source": source_name,
+                "githubRepoContext": { "startingBranch": "main" }
+            },
+            "automationMode": "AUTO_CREATE_PR",
+            "title": f"Task: {task.id}"
+        }
+
+        key_index = self.scheduler.index_of(current_key)
+        self.journal.intent(task.id, key_index, payload["title"])
+        called = time.monotonic()
+        try:
+            with self.metrics.span("launch.create_session", task=task.id, key=key_index, attempt=attempt):
+                # Single attempt: requeueing below is the only retry layer, and it can switch keys
+                session = await self.api.create_session(current_key, payload, reservation, retry=False)
+        except JulesAPIError as e:
+            self._adapt(current_key, ticket, e.status, time.monotonic() - called)
+            if e.sent and (e.status is None or (e.status >= 500 and e.status not in NOT_PROCESSED_STATUSES)):
+                # The request may have reached the API; reconcile before ever resending it
+                print(f"❓ {task.id}: {e}. Outcome unknown, will reconcile.")
+                self.journal.unknown(task.id, str(e))
+                self._unsettled[task.id] = (task, payload["title"], digest)
+                self.stats["unknown"] += 1
+                return False
+            self.journal.failed(task.id, f"HTTP {e.status}" if e.status else str(e))
+            # Throttled, or never sent (connection refused, circuit open): safe to requeue
+            if (e.status in THROTTLE_STATUSES or not e.sent) and attempt < self.max_attempts:
+                self.stats["throttled"] += 1
+                print(f"⏳ {task.id}: {e} on {key_label}, requeueing (attempt {attempt}/{self.max_attempts})")
+                return True
+            print(f"❌ Error creating session for {task.id}: {e}")
+            if e.body is not None:
+                print(e.body)
+            self.stats["failed"] += 1
+            return False
+        finally:
+            self.timings["api"] += time.monotonic() - called
+
+        self._adapt(current_key, ticket, 200, time.monotonic() - called)
+        session_id = session.get("name", "")
+        self.journal.done(task.id, session_id, key_index)
+        print(f"🚀 Session Created! ID: {session_id}")
+        self.prompt_store.put(prompt)
+        self._record_session(task, session_id, key_index, payload["title"], prompt_digest=digest)
+        self.stats["dispatched"] += 1
+        return False
+
+    def _adapt(self, api_key: str, ticket: Optional[int], status: Optional[int], latency: float):
+        """Feeds a create_session outcome to the key's in-flight limit."""
+        if self.controller is None or ticket is None:
+            return
+        change = self.controller.observe(api_key, ticket, status, latency)
+        if change == "decrease":
+            limit = self.controller.limit_of(api_key)
+            self.metrics.emit({"type": "concurrency", "key": self.scheduler.index_of(api_key),
+                               "limit": round(limit, 2), "status": status, "latency": round(latency, 4)})
+
+    def _is_duplicate(self, task: Task, digest: str) -> bool:
+        """True if this exact prompt already went (or is going) to this repo."""
+        owner = self._claimed_prompts.setdefault(digest, task.id)
+        if owner != task.id:
+            print(f"♻️  {task.id}: prompt identical to {owner} in this batch; skipping.")
+            self.stats["duplicates"] += 1
+            return True
+        if self.store is None:
+            return False
+        existing = self.store.find_by_prompt(self.repo_name, digest, exclude_states=REDISPATCHABLE_STATES)
+        if existing:
+            print(f"♻️  {task.id}: identical prompt already dispatched as {existing['sessionId']}; skipping.")
+            self.stats["duplicates"] += 1
+            # The work is covered, so let the provider consider the task dispatched
+            self._pending_tasks.append(task)
+            return True
+        return False
+
+    def _record_session(self, task: Task, session_id: str, key_index: int, title: str,
+                        store_record: bool = True, prompt_digest: Optional[str] = None):
+        """Queues a dispatched task for the provider and store; flushed once per window."""
+        self._pending_tasks.append(task)
+        if session_id and store_record:
+            self._pending_records.append({
+                "sessionId": session_id,
+                "component": f"{self.component_prefix}{task.id}",
+                "title": title,
+                "startTime": datetime.now().isoformat(),
+                "status": "created",
+                "keyIndex": key_index,
+                "repo": self.repo_name,
+                "promptHash": prompt_digest,
+            })
+        if len(self._pending_tasks) >= self.batch_size:
+            self._checkpoint()
+
+    def _checkpoint(self) -> bool:
+        """Persists buffered session records and provider marks (one write each)."""
+        with self.metrics.span("launch.checkpoint", tasks=len(self._pending_tasks),
+                               records=len(self._pending_records)):
+            return self._persist()
+
+    def _persist(self) -> bool:
+        ok = self._flush_records()
+        if self._pending_tasks:
+            tasks, self._pending_tasks = self._pending_tasks, []
+            try:
+                self.provider.on_dispatch_many(tasks)
+            except Exception as e:
+                # The provider rolled back; retry the whole window next time
+                self._pending_tasks = tasks + self._pending_tasks
+                print(f"❌ Failed to persist task state: {e}")
+                ok = False
+        return ok
+
+    def _flush_records(self) -> bool:
+        if not self._pending_records or self.store is None:
+            return True
+        records, self._pending_records = self._pending_records, []
+        try:
+            self.store.upsert_many(records)
+        except Exception as e:
+            # Keep them for the next flush rather than losing track of live sessions
+            self._pending_records = records + self._pending_records
+            print(f"❌ Failed to record {len(records)} sessions in {self.store.path}: {e}")
+            return False
+        return True
+
+    async def _resume(self, tasks: List[Task]) -> List[Task]:
+        """Replays the dispatch journal and drops tasks that already have a session."""
+        entries = self.journal.replay()
+        if not entries:
+            return tasks
+        print(f"♻️  Resuming from dispatch journal {self.journal.path} ({len(entries)} tasks seen).")
+
+        unresolved = [e for e in entries.values() if e["phase"] in (INTENT, UNKNOWN)]
+        if unresolved:
+            await self._reconcile(unresolved)
+            entries = self.journal.replay()
+
+        remaining = []
+        for task in tasks:
+            entry = entries.get(task.id)
+            if entry is None or entry["phase"] == FAILED:
+                remaining.append(task)
+            elif entry["phase"] == DONE:
+                # Created before the crash; finish the bookkeeping without calling the API again
+                session_id = entry.get("sessionId", "")
+                self._record_session(task, session_id, entry["keyIndex"], entry.get("title", f"Task: {task.id}"),
+                                     store_record=bool(session_id) and not self.store.get(session_id))
+                self.stats["resumed"] += 1
             else:
-                session = self.api.create_session(current_key, payload)
-                if session:
-                    print(f"🚀 Session Created! ID: {session.get('name')}")
-                    self.provider.on_dispatch(task)
-            
-            active_count += 1
-            
-            # Throttling
-            if active_count >= self.concurrency:
-                print(f"⏳ Batch limit reached ({self.concurrency}). Pausing for 5 seconds...")
-                time.sleep(5)
-                active_count = 0
+                print(f"⚠️  {task.id}: could not confirm whether it was dispatched; holding it back.")
+                self.stats["unknown"] += 1
+        self._checkpoint()
+        return remaining
+
+    async def _reconcile(self, entries: List[Dict[str, Any]]):
+        """Looks for sessions matching in-flight journal entries and records the outcome."""
+        by_key: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        for entry in entries:
+            if "keyIndex" in entry and "title" in entry:
+                by_key.setdefault(entry["keyIndex"], {})[entry["title"]] = entry
+
+        for key_index, wanted in by_key.items():
+            if not 0 <= key_index < len(self.config.api_keys):
+                continue
+            api_key = self.config.api_keys[key_index]
+            print(f"🔎 Reconciling {len(wanted)} in-flight dispatches on Key #{key_index + 1}...")
+            token, pages, exhausted = None, 0, False
+            try:
+                while wanted and pages < self.reconcile_pages:
+                    page = await self.api.list_sessions_page(api_key, page_token=token)
+                    pages += 1
+                    for session in page.get("sessions", []):
+                        entry = wanted.get(session.get("title"))
+                        if not entry:
+                            continue
+                        created, sent = parse_time(session.get("createTime")), parse_time(entry.get("ts"))
+                        if created and sent and created < sent - RECONCILE_SKEW:
+                            continue  # an older session for the same task
+                        self.journal.done(entry["task"], session["name"], key_index)
+                        del wanted[entry["title"]]
+                    token = page.get("nextPageToken")
+                    if not token:
+                        exhausted = True
+                        break
+            except JulesAPIError as e:
+                print(f"❌ Could not list sessions for reconciliation: {e}")
+                continue
+
+            if exhausted:
+                for entry in wanted.values():
+                    self.journal.failed(entry["task"], "no session found on reconcile")
+
+    def _settle(self, entries: Dict[str, Dict[str, Any]]) -> bool:
+        """Moves this run's unknowns that reconcile resolved into the dispatched/failed stats.
+
+        Returns True if any sessions were found, i.e. there is new state to persist.
+        """
+        found = False
+        for task_id, (task, title, digest) in list(self._unsettled.items()):
+            entry = entries.get(task_id, {})
+            if entry.get("phase") == DONE:
+                self._record_session(task, entry.get("sessionId", ""), entry["keyIndex"], title,
+                                     prompt_digest=digest)
+                self.stats["dispatched"] += 1
+                found = True
+            elif entry.get("phase") == FAILED:
+                self.stats["failed"] += 1
             else:
-                time.sleep(1)
+                continue
+            del self._unsettled[task_id]
+        return found
 
-        print("\n✅ Batch dispatch completed.")
+    async def _finish_journal(self):
+        """Reconciles this run's unknowns, then drops everything that is settled."""
+        # Settled entries are only safe to drop once the store and provider have them
+        if not self._checkpoint():
+            print(f"⚠️  Keeping {self.journal.path} until task state is persisted.")
+            return
+        entries = self.journal.replay()
+        unresolved = [e for e in entries.values() if e["phase"] in (INTENT, UNKNOWN)]
+        if unresolved:
+            await self._reconcile(unresolved)
+            entries = self.journal.replay()
+            if self._settle(entries) and not self._checkpoint():
+                print(f"⚠️  Keeping {self.journal.path} until task state is persisted.")
+                return
+        keep = [e for e in entries.values() if e["phase"] in (INTENT, UNKNOWN)]
+        self.stats["unknown"] = len(keep)
+        self.journal.compact(keep)
+        if keep:
+            print(f"⚠️  {len(keep)} dispatches remain unconfirmed in {self.journal.path}.")
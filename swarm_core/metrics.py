@@ -0,0 +1,172 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .config import SwarmConfig
+
+# Retry number of the request being made (0 = first try); set by whoever retries
+current_retry: ContextVar[int] = ContextVar("current_retry", default=0)
+
+# Upper bounds (seconds) of the request latency histogram
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_SESSION_ID = re.compile(r"^sessions/[^/:]+")
+_ACTIVITY_ID = re.compile(r"/activities/[^/:]+")
+
+
+def endpoint_of(path: str) -> str:
+    """Collapses ids so requests group by endpoint: sessions/123:sendInput -> sessions/{id}:sendInput."""
+    path = _SESSION_ID.sub("sessions/{id}", path)
+    return _ACTIVITY_ID.sub("/activities/{id}", path)
+
+
+class Metrics:
+    """Structured request events and spans, as JSONL and/or Prometheus text.
+
+    Every event is appended to the JSONL file when one is configured;
+    aggregates (request counts, a latency histogram, span totals) are
+    always kept in memory and can be served on a Prometheus endpoint.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        self._lock = threading.Lock()
+        self._file = None
+        self.path: Optional[Path] = None
+        self.port: Optional[int] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self.requests: Dict[Tuple[str, str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], list] = {}  # (endpoint, method) -> [bucket counts..., sum, count]
+        self.spans: Dict[str, list] = {}  # name -> [total seconds, count]
+        if path:
+            self.open(path)
+
+    def open(self, path: Union[str, Path]):
+        path = Path(path)
+        with self._lock:
+            if self.path == path:
+                return
+            if self._file is not None:
+                self._file.close()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+            self.path = path
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server = None
+
+    def emit(self, event: Dict[str, Any]):
+        if self._file is None:
+            return
+        event.setdefault("ts", round(time.time(), 3))
+        line = json.dumps(event)
+        with self._lock:
+            if self._file is not None:
+                self._file.write(line + "\n")
+                self._file.flush()
+
+    def request(self, method: str, path: str, key_index: Optional[int], status: Optional[int],
+                latency: float, wait: float = 0.0, retry: Optional[int] = None):
+        """Records one API request. `wait` is time spent pacing before it was sent."""
+        endpoint = endpoint_of(path)
+        retry = current_retry.get() if retry is None else retry
+        key = "" if key_index is None else str(key_index + 1)
+        with self._lock:
+            labels = (endpoint, method, key, str(status) if status is not None else "error")
+            self.requests[labels] = self.requests.get(labels, 0) + 1
+            hist = self.latency.setdefault((endpoint, method), [0] * (len(LATENCY_BUCKETS) + 2))
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    hist[i] += 1
+            hist[-2] += latency
+            hist[-1] += 1
+        self.emit({"type": "request", "endpoint": endpoint, "method": method, "key": key_index,
+                   "status": status, "latency": round(latency, 4), "wait": round(wait, 4), "retry": retry})
+
+    def record_span(self, name: str, elapsed: float, **attrs):
+        with self._lock:
+            total = self.spans.setdefault(name, [0.0, 0])
+            total[0] += elapsed
+            total[1] += 1
+        self.emit({"type": "span", "name": name, "elapsed": round(elapsed, 4), **attrs})
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """Times a block (sync or inside a coroutine) and records it as a span."""
+        started = time.monotonic()
+        try:
+            yield attrs
+        finally:
+            self.record_span(name, time.monotonic() - started, **attrs)
+
+    def render_prometheus(self) -> str:
+        lines = ["# HELP jules_requests_total Jules API requests by endpoint, key and status.",
+                 "# TYPE jules_requests_total counter"]
+        with self._lock:
+            for (endpoint, method, key, status), count in sorted(self.requests.items()):
+                lines.append(f'jules_requests_total{{endpoint="{endpoint}",method="{method}",'
+                             f'key="{key}",status="{status}"}} {count}')
+            lines += ["# HELP jules_request_latency_seconds Jules API request latency.",
+                      "# TYPE jules_request_latency_seconds histogram"]
+            for (endpoint, method), hist in sorted(self.latency.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    lines.append(f'jules_request_latency_seconds_bucket{{{labels},le="{bound}"}} {hist[i]}')
+                lines.append(f'jules_request_latency_seconds_bucket{{{labels},le="+Inf"}} {hist[-1]}')
+                lines.append(f'jules_request_latency_seconds_sum{{{labels}}} {hist[-2]:.6f}')
+                lines.append(f'jules_request_latency_seconds_count{{{labels}}} {hist[-1]}')
+            lines += ["# HELP jules_span_seconds_total Time spent in each swarm stage.",
+                      "# TYPE jules_span_seconds_total counter"]
+            for name, (total, _) in sorted(self.spans.items()):
+                lines.append(f'jules_span_seconds_total{{name="{name}"}} {total:.6f}')
+            lines += ["# TYPE jules_span_count_total counter"]
+            for name, (_, count) in sorted(self.spans.items()):
+                lines.append(f'jules_span_count_total{{name="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port: int, host: str = "127.0.0.1"):
+        """Serves /metrics in the Prometheus text format from a daemon thread."""
+        if self._server is not None:
+            return
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render_prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="jules-metrics", daemon=True).start()
+        print(f"📈 Prometheus metrics on http://{host}:{self.port}/metrics")
+
+
+# Process-wide sink shared by every client and runner
+METRICS = Metrics()
+
+
+def metrics_from_config(config: SwarmConfig) -> Metrics:
+    """Points the shared sink at JULES_METRICS_FILE / JULES_METRICS_PORT, if set."""
+    if config.metrics_file:
+        METRICS.open(config.metrics_file)
+    if config.metrics_port is not None:
+        METRICS.serve_prometheus(config.metrics_port)
+    return METRICS
@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .metrics import METRICS, Metrics
+
+# A stage is an async callable returning a one-line summary (or None)
+StageFn = Callable[[], Awaitable[Optional[str]]]
+
+
+class StageResult:
+    def __init__(self, name: str, elapsed: float, summary: Optional[str] = None,
+                 error: Optional[BaseException] = None):
+        self.name = name
+        self.elapsed = elapsed
+        self.summary = summary
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class Pipeline:
+    """Runs named async stages in order on the caller's event loop.
+
+    A failing stage is reported and the next one still runs, the way the
+    old subprocess cycle carried on after a non-zero exit. Timings are kept
+    per run and accumulated across runs for a final report.
+    """
+
+    def __init__(self, stages: List[Tuple[str, StageFn]], metrics: Metrics = METRICS):
+        self.stages = stages
+        self.metrics = metrics
+        self.totals: Dict[str, float] = {}
+        self.runs = 0
+
+    async def run(self) -> List[StageResult]:
+        results = []
+        for name, stage in self.stages:
+            print(f"\n🚀 [{datetime.now().strftime('%H:%M:%S')}] Starting: {name}")
+            started = time.monotonic()
+            summary, error = None, None
+            try:
+                summary = await stage()
+            except Exception as e:
+                error = e
+            elapsed = time.monotonic() - started
+            self.totals[name] = self.totals.get(name, 0.0) + elapsed
+            self.metrics.record_span(f"cycle.{name}", elapsed, ok=error is None, run=self.runs + 1)
+
+            stamp = datetime.now().strftime('%H:%M:%S')
+            if error is None:
+                print(f"✅ [{stamp}] Finished: {name} ({elapsed:.1f}s)" + (f" - {summary}" if summary else ""))
+            else:
+                print(f"❌ [{stamp}] Failed: {name} ({elapsed:.1f}s)")
+                print(f"   Error: {error}")
+            results.append(StageResult(name, elapsed, summary, error))
+        self.runs += 1
+        return results
+
+    @staticmethod
+    def report(results: List[StageResult]) -> str:
+        total = sum(r.elapsed for r in results)
+        lines = [f"⏱️  Stage timings ({total:.1f}s):"]
+        for r in results:
+            share = r.elapsed / total if total > 0 else 0.0
+            status = "ok" if r.ok else "failed"
+            lines.append(f"   {r.name:<8} {r.elapsed:8.1f}s {share:5.0%}  {status}")
+        return "\n".join(lines)
+
+    def totals_report(self) -> str:
+        total = sum(self.totals.values())
+        lines = [f"⏱️  Totals over {self.runs} cycles ({total:.1f}s):"]
+        for name, elapsed in self.totals.items():
+            lines.append(f"   {name:<8} {elapsed:8.1f}s  avg {elapsed / max(1, self.runs):.1f}s")
+        return "\n".join(lines)
@@ -0,0 +1,240 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from .api import AsyncJulesAPI, JulesAPIError, client_from_config
+from .config import SwarmConfig
+from .state import session_name
+
+# Sessions in these states never change again, so there is no point re-polling them
+TERMINAL_STATES = {"COMPLETED", "FAILED", "CANCELLED"}
+
+# Below this many sessions on one key, per-session GETs are cheaper than paging the list
+LIST_THRESHOLD = 5
+
+
+def session_status(details: Optional[Dict[str, Any]]) -> str:
+    """Normalises a session payload into a display status."""
+    if not details:
+        return "UNKNOWN"
+    if details.get("state"):
+        return details["state"]
+    if details.get("outputs"):
+        return "DONE (PR Ready)"
+    return "RUNNING"
+
+
+def is_terminal(state: Optional[str]) -> bool:
+    return bool(state) and state.upper() in TERMINAL_STATES
+
+
+class PollResult:
+    def __init__(self):
+        self.statuses: Dict[str, str] = {}
+        self.details: Dict[str, Optional[Dict[str, Any]]] = {}
+        # Key index that answered for sessions whose record did not say which key created them
+        self.owners: Dict[str, int] = {}
+        self.fetched = 0
+        self.skipped = 0
+        self.errors = 0
+        self.pages = 0
+        self.gets = 0
+        self.elapsed = 0.0
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for status in self.statuses.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        rate = self.fetched / self.elapsed if self.elapsed > 0 else 0.0
+        return (f"⏱️  Polled {self.fetched} sessions in {self.elapsed:.1f}s ({rate:.1f}/s) with "
+                f"{self.pages} list pages and {self.gets} GETs; "
+                f"{self.skipped} skipped as terminal, {self.errors} errors.")
+
+
+class StatusPoller:
+    """Fetches many session states at once, fanned out across all API keys.
+
+    Keys that created at least `list_threshold` of the sessions are
+    refreshed by paging through `sessions.list` (up to `max_pages` pages),
+    so a hundred sessions cost one request instead of a hundred. Whatever
+    the listing did not cover is fetched one by one: with the key that
+    created it if the record has a `keyIndex`, else with whichever key the
+    scheduler says has headroom.
+
+    Records without a `keyIndex` (imported ones, mostly) are matched
+    against every key's listing when there are enough of them, and a 404
+    on a single GET is retried on the other keys. The key that answered
+    lands in `PollResult.owners` and `apply_states` saves it, so the next
+    poll takes the listing path.
+    """
+
+    def __init__(self, api: AsyncJulesAPI, api_keys: List[str], concurrency: int = 16,
+                 list_threshold: int = LIST_THRESHOLD, max_pages: int = 50, page_size: int = 100):
+        self.api = api
+        self.api_keys = api_keys
+        self.concurrency = max(1, concurrency)
+        self.list_threshold = list_threshold
+        self.max_pages = max_pages
+        self.page_size = page_size
+
+    def _key_for(self, session: Dict[str, Any], i: int) -> Optional[str]:
+        if self._owned(session):
+            return self.api_keys[session["keyIndex"]]
+        if self.api.scheduler:
+            return None  # let the scheduler choose
+        return self.api_keys[i % len(self.api_keys)]
+
+    def _record(self, result: PollResult, session_id: str, details: Optional[Dict[str, Any]]):
+        result.fetched += 1
+        result.details[session_id] = details
+        result.statuses[session_id] = session_status(details)
+
+    def _owned(self, session: Dict[str, Any]) -> bool:
+        index = session.get("keyIndex")
+        return isinstance(index, int) and 0 <= index < len(self.api_keys)
+
+    async def _list_key(self, key_index: int, wanted: Dict[str, Dict[str, Any]], result: PollResult,
+                        unowned: Optional[Dict[str, Dict[str, Any]]] = None):
+        """Pages through one key's sessions, recording (and removing) the wanted ones.
+
+        `unowned` is shared by every key's listing: sessions with no known
+        creating key are matched by name on whichever key lists them.
+        """
+        token, pages = None, 0
+        unowned = {} if unowned is None else unowned
+        try:
+            while (wanted or unowned) and pages < self.max_pages:
+                page = await self.api.list_sessions_page(self.api_keys[key_index], self.page_size, token)
+                pages += 1
+                result.pages += 1
+                for details in page.get("sessions", []):
+                    name = session_name(details.get("name", ""))
+                    session = wanted.pop(name, None)
+                    if session is None:
+                        session = unowned.pop(name, None)
+                        if session is not None:
+                            result.owners[session["sessionId"]] = key_index
+                    if session is not None:
+                        self._record(result, session["sessionId"], details)
+                token = page.get("nextPageToken")
+                if not token:
+                    return
+        except JulesAPIError as e:
+            print(f"❌ Error listing sessions on Key #{key_index + 1}: {e}; falling back to GETs.")
+
+    async def _find_owner(self, session_id: str, tried: str,
+                          result: PollResult) -> Optional[Dict[str, Any]]:
+        """GETs a session on every key except `tried` until one of them knows it."""
+        for index, api_key in enumerate(self.api_keys):
+            if api_key == tried:
+                continue
+            try:
+                details = await self.api.get_session_details(api_key, session_id)
+            except JulesAPIError as e:
+                if e.status == 404:
+                    continue
+                return None
+            finally:
+                result.gets += 1
+            result.owners[session_id] = index
+            return details
+        return None
+
+    async def poll(self, sessions: List[Dict[str, Any]], skip_terminal: bool = True) -> PollResult:
+        result = PollResult()
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(i: int, session: Dict[str, Any]):
+            session_id = session["sessionId"]
+            async with semaphore:
+                api_key, reservation = self._key_for(session, i), None
+                if api_key is None:
+                    reservation = await self.api.scheduler.acquire()
+                    api_key = reservation.key
+                try:
+                    details = await self.api.get_session_details(api_key, session_id, reservation)
+                    if not self._owned(session):
+                        result.owners[session_id] = self.api_keys.index(api_key)
+                except JulesAPIError as e:
+                    details = None
+                    if e.status == 404 and not self._owned(session):
+                        # Some other key created it; ask the rest before giving up
+                        details = await self._find_owner(session_id, api_key, result)
+                    if details is None:
+                        print(f"❌ Error fetching session {session_id}: {e}")
+                        result.errors += 1
+                finally:
+                    if reservation is not None:
+                        reservation.release()
+            result.gets += 1
+            self._record(result, session_id, details)
+
+        pending: List[Dict[str, Any]] = []
+        for session in sessions:
+            if skip_terminal and is_terminal(session.get("state")):
+                result.statuses[session["sessionId"]] = session["state"]
+                result.skipped += 1
+            else:
+                pending.append(session)
+
+        # Group by creating key; keys with enough sessions are listed instead of fetched one by one
+        by_key: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        unowned: Dict[str, Dict[str, Any]] = {}
+        for session in pending:
+            if self._owned(session):
+                by_key.setdefault(session["keyIndex"], {})[session_name(session["sessionId"])] = session
+            else:
+                unowned[session_name(session["sessionId"])] = session
+        listed = {index: wanted for index, wanted in by_key.items() if len(wanted) >= self.list_threshold}
+        if len(unowned) >= self.list_threshold:
+            # Records without a keyIndex (e.g. imported ones) are looked for on every key's list
+            for index in range(len(self.api_keys)):
+                listed.setdefault(index, {})
+        else:
+            unowned = {}
+
+        with self.api.metrics.span("poll", sessions=len(sessions), fetched=len(pending)) as span:
+            await asyncio.gather(*(self._list_key(index, wanted, result, unowned)
+                                   for index, wanted in listed.items()))
+            # Whatever the listing did not cover (few per key, no keyIndex, past max_pages)
+            await asyncio.gather(*(fetch(i, session) for i, session in enumerate(pending)
+                                   if session["sessionId"] not in result.details))
+            span.update(errors=result.errors, pages=result.pages, gets=result.gets)
+        result.elapsed = time.monotonic() - started
+        return result
+
+
+def apply_states(sessions: List[Dict[str, Any]], result: PollResult) -> List[Dict[str, Any]]:
+    """Copies freshly polled states (and newly found owning keys) onto the session records.
+
+    Returns the changed records.
+    """
+    changed = []
+    for session in sessions:
+        updated = False
+        owner = result.owners.get(session["sessionId"])
+        if owner is not None and session.get("keyIndex") != owner:
+            session["keyIndex"] = owner
+            updated = True
+        details = result.details.get(session["sessionId"])
+        if details and details.get("state") and details["state"] != session.get("state"):
+            session["state"] = details["state"]
+            updated = True
+        if updated:
+            changed.append(session)
+    return changed
+
+
+def poll_sessions(config: SwarmConfig, sessions: List[Dict[str, Any]],
+                  concurrency: int = 16, skip_terminal: bool = True) -> PollResult:
+    """Blocking helper for runners: polls `sessions` with a fresh pooled client."""
+    async def run():
+        async with client_from_config(config, pool_size=concurrency) as api:
+            poller = StatusPoller(api, config.api_keys, concurrency)
+            return await poller.poll(sessions, skip_terminal=skip_terminal)
+
+    return asyncio.run(run())
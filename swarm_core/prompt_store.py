@@ -0,0 +1,38 @@
+import hashlib
+from pathlib import Path
+from typing import Optional, Union
+
+from .files import atomic_write
+
+
+def prompt_hash(prompt: str) -> str:
+    """Content address of a rendered prompt."""
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+class PromptStore:
+    """Content-addressed store of rendered prompts: `root/ab/abcdef....txt`.
+
+    Prompts are immutable once written, so identical prompts are stored
+    once no matter how many sessions reference them.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / f"{digest}.txt"
+
+    def put(self, prompt: str) -> str:
+        digest = prompt_hash(prompt)
+        path = self.path_for(digest)
+        if path.exists():
+            return digest
+        atomic_write(path, prompt)
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        path = self.path_for(digest)
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
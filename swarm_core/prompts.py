@@ -1,34 +1,128 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from string import Formatter
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
 from pathlib import Path
+import re
+import threading
+
+# [ANY_KEY] style placeholders used by the prompts/*.md templates
+BRACKET_PLACEHOLDER = re.compile(r"\[([^\[\]\r\n]+)\]")
+
+class BracketTemplate:
+    """A `[KEY]` template split once into literal text and placeholder slots.
+
+    Rendering is a single pass. Placeholders with no matching context key
+    are left as written, like the old per-key str.replace did.
+    """
+
+    def __init__(self, text: str):
+        self.parts: List[Tuple[str, Optional[str], str]] = []  # (literal, key, raw placeholder)
+        cursor = 0
+        for match in BRACKET_PLACEHOLDER.finditer(text):
+            self.parts.append((text[cursor:match.start()], match.group(1), match.group(0)))
+            cursor = match.end()
+        self.tail = text[cursor:]
+
+    def render(self, task_context: Dict[str, Any]) -> str:
+        values = {str(key).upper(): str(value) for key, value in task_context.items()}
+        out = []
+        for literal, key, raw in self.parts:
+            out.append(literal)
+            out.append(values.get(key, raw))
+        out.append(self.tail)
+        return "".join(out)
+
+class FormatTemplate:
+    """A str.format template parsed once; renders like template.format(**context)."""
+
+    _formatter = Formatter()
+
+    def __init__(self, text: str):
+        self.parts = list(self._formatter.parse(text))
+
+    def render(self, task_context: Dict[str, Any]) -> str:
+        formatter = self._formatter
+        out = []
+        for literal, field_name, format_spec, conversion in self.parts:
+            out.append(literal)
+            if field_name is None:
+                continue
+            value, _ = formatter.get_field(field_name, (), task_context)
+            value = formatter.convert_field(value, conversion)
+            if format_spec and "{" in format_spec:
+                format_spec = formatter.vformat(format_spec, (), task_context)
+            out.append(formatter.format_field(value, format_spec or ""))
+        return "".join(out)
+
+class TemplateCache:
+    """Compiled templates shared by every builder in the process.
+
+    File templates are keyed by path, mtime and size, so an edited file
+    is recompiled on the next build; inline templates by their text.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: Hashable, compile_fn: Callable[[], Any]):
+        with self._lock:
+            template = self._entries.get(key)
+        if template is None:
+            template = compile_fn()
+            with self._lock:
+                self._entries[key] = template
+        return template
+
+    def get_file(self, path: Path, kind: type = BracketTemplate):
+        stat = path.stat()
+        key = (kind, str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+        return self._get(key, lambda: kind(path.read_text(encoding="utf-8")))
+
+    def get_string(self, text: str, kind: type = FormatTemplate):
+        return self._get((kind, text), lambda: kind(text))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+TEMPLATE_CACHE = TemplateCache()
 
 class PromptBuilder(ABC):
     @abstractmethod
     def build(self, task_context: Dict[str, Any]) -> str:
         pass
 
+    def build_many(self, task_contexts: List[Dict[str, Any]]) -> List[str]:
+        """Renders a whole batch of task contexts."""
+        return [self.build(context) for context in task_contexts]
+
 class FileTemplateBuilder(PromptBuilder):
-    def __init__(self, template_path: str):
+    def __init__(self, template_path: str, cache: TemplateCache = TEMPLATE_CACHE):
         self.template_path = Path(template_path)
-        if not self.template_path.exists():
-             # Fallback logic could go here or raise error
-             pass
+        self.cache = cache
 
-    def build(self, task_context: Dict[str, Any]) -> str:
+    def _template(self) -> BracketTemplate:
         if not self.template_path.exists():
             raise FileNotFoundError(f"Template not found: {self.template_path}")
-            
-        content = self.template_path.read_text(encoding="utf-8")
-        # Simple replacement
-        for key, value in task_context.items():
-            placeholder = f"[{key.upper()}]"
-            content = content.replace(placeholder, str(value))
-        return content
+        return self.cache.get_file(self.template_path, BracketTemplate)
+
+    def build(self, task_context: Dict[str, Any]) -> str:
+        return self._template().render(task_context)
+
+    def build_many(self, task_contexts: List[Dict[str, Any]]) -> List[str]:
+        template = self._template()
+        return [template.render(context) for context in task_contexts]
 
 class DynamicBuilder(PromptBuilder):
-    def __init__(self, template_str: str):
+    def __init__(self, template_str: str, cache: TemplateCache = TEMPLATE_CACHE):
         self.template_str = template_str
+        self.cache = cache
 
     def build(self, task_context: Dict[str, Any]) -> str:
         # Use python formatting
-        return self.template_str.format(**task_context)
+        return self.cache.get_string(self.template_str, FormatTemplate).render(task_context)
+
+    def build_many(self, task_contexts: List[Dict[str, Any]]) -> List[str]:
+        template = self.cache.get_string(self.template_str, FormatTemplate)
+        return [template.render(context) for context in task_contexts]
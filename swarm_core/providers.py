@@ -1,8 +1,11 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 import re
 
+from .files import atomic_write
+
 class Task:
     def __init__(self, id: str, description: str, metadata: Optional[Dict[str, Any]] = None):
         self.id = id
@@ -23,6 +26,30 @@ class TaskProvider(ABC):
         """Called when a task is successfully dispatched."""
         pass
 
+    def on_dispatch_many(self, tasks: List[Task]) -> None:
+        """Called once per dispatch window with every task that went out."""
+        with self.transaction():
+            for task in tasks:
+                self.on_dispatch(task)
+
+    @contextmanager
+    def transaction(self):
+        """Groups on_dispatch calls: flushed together on success, rolled back on error."""
+        try:
+            yield self
+            self.flush()
+        except BaseException:
+            self.rollback()
+            raise
+
+    def flush(self) -> None:
+        """Persists state changed by on_dispatch. Providers that buffer override this."""
+        pass
+
+    def rollback(self) -> None:
+        """Discards state changed by on_dispatch in the transaction that failed."""
+        pass
+
 class SimpleFileProvider(TaskProvider):
     def __init__(self, file_path: str):
         self.file_path = Path(file_path)
@@ -44,27 +71,104 @@ class SimpleFileProvider(TaskProvider):
     def on_dispatch(self, task: Task) -> None:
         pass  # Simple files don't track state
 
+    def on_dispatch_many(self, tasks: List[Task]) -> None:
+        pass  # Nothing to write, so nothing to batch
+
+# Matches: ### [ ] Paper {ID}  (also [/] dispatched and [x] done)
+BACKLOG_HEADER = re.compile(r"^### \[(.)\] Paper (.*?)$")
+PENDING_STATUS = "- **Status:** Pending"
+DISPATCHED_STATUS = "- **Status:** Dispatched"
+
+class BacklogEntry:
+    """One paper block in the backlog, located by byte offsets."""
+
+    def __init__(self, paper_id: str, mark: str, header_offset: int, header: bytes):
+        self.paper_id = paper_id
+        self.mark = mark
+        self.header_offset = header_offset
+        self.header = header
+        self.status_offset: Optional[int] = None
+        self.status_line: Optional[bytes] = None
+
 class BacklogProvider(TaskProvider):
+    """Tasks from `### [ ] Paper {ID}` blocks in RESEARCH_BACKLOG.md.
+
+    The file is scanned once, streaming, into an index of entries with byte
+    offsets; scanning stops as soon as `limit` pending papers are found.
+    `on_dispatch` writes its mark straight away; inside `transaction()`
+    (as used by `on_dispatch_many`) marks are buffered and applied in a
+    single atomic rewrite when the transaction ends.
+    """
+
     def __init__(self, backlog_path: str):
         self.backlog_path = Path(backlog_path)
+        self._index: Dict[str, BacklogEntry] = {}
+        self._scanned_to = 0
+        self._scan_complete = False
+        self._stamp: Optional[tuple] = None
+        self._dispatched: List[str] = []
+        # Length of _dispatched when the open transaction began (None = no transaction)
+        self._txn_start: Optional[int] = None
+
+    def _file_stamp(self) -> tuple:
+        stat = self.backlog_path.stat()
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reset_index(self):
+        self._index = {}
+        self._scanned_to = 0
+        self._scan_complete = False
+        self._stamp = self._file_stamp()
+
+    def _scan(self, stop_after_pending: int = 0) -> List[BacklogEntry]:
+        """Extends the index from where the last scan stopped.
+
+        Returns the pending entries encountered, stopping early once
+        `stop_after_pending` of them have been seen (0 = scan to the end).
+        """
+        pending = []
+        if self._scan_complete:
+            return pending
+        with open(self.backlog_path, "rb") as f:
+            f.seek(self._scanned_to)
+            offset = self._scanned_to
+            last: Optional[BacklogEntry] = None
+            for raw in f:
+                line = raw.decode("utf-8").rstrip("\r\n")
+                match = BACKLOG_HEADER.match(line)
+                if match:
+                    if stop_after_pending and len(pending) >= stop_after_pending:
+                        # Stop on a block boundary so the next scan resumes cleanly
+                        self._scanned_to = offset
+                        return pending
+                    last = BacklogEntry(match.group(2).strip(), match.group(1), offset, raw)
+                    self._index.setdefault(last.paper_id, last)
+                    if last.mark == " ":
+                        pending.append(last)
+                elif last is not None and line.startswith("- **Status:**"):
+                    last.status_offset = offset
+                    last.status_line = raw
+                    last = None
+                elif line.startswith("### "):
+                    last = None
+                offset += len(raw)
+            self._scanned_to = offset
+            self._scan_complete = True
+        return pending
 
     def get_tasks(self, limit: int = 0) -> List[Task]:
         if not self.backlog_path.exists():
             raise FileNotFoundError(f"Backlog not found at {self.backlog_path}")
 
-        content = self.backlog_path.read_text(encoding="utf-8")
-        # Matches: ### [ ] Paper {ID}
-        pattern = r"### \[ \] Paper (.*?)$"
-        matches = re.findall(pattern, content, re.MULTILINE)
-        
+        self._reset_index()
         tasks = []
-        for match in matches:
-            paper_id = match.strip()
+        for entry in self._scan(stop_after_pending=limit):
+            paper_id = entry.paper_id
             # Construct URLs for context
             id_with_v = paper_id if "v" in paper_id else f"{paper_id}v1"
             html_url = f"https://arxiv.org/html/{id_with_v}"
             pdf_url = f"https://arxiv.org/pdf/{paper_id}.pdf"
-            
+
             tasks.append(Task(
                 id=paper_id,
                 description=f"Process Paper {paper_id}",
@@ -79,24 +183,68 @@ class BacklogProvider(TaskProvider):
         return tasks
 
     def on_dispatch(self, task: Task) -> None:
-        if not self.backlog_path.exists():
+        # Outside a transaction this is a transaction of one, written through at once
+        with self.transaction():
+            self._dispatched.append(task.id)
+
+    @contextmanager
+    def transaction(self):
+        if self._txn_start is not None:
+            # Nested: the outermost transaction flushes or rolls back
+            yield self
             return
+        self._txn_start = len(self._dispatched)
+        try:
+            with super().transaction():
+                yield self
+        finally:
+            self._txn_start = None
 
-        content = self.backlog_path.read_text(encoding="utf-8")
-        paper_id = task.id
-        
-        # Pattern: Header followed by status line
-        target_pattern = rf"### \[ \] Paper {re.escape(paper_id)}\n- \*\*Status:\*\* Pending"
-        replacement = f"### [/] Paper {paper_id}\n- **Status:** Dispatched"
-        
-        if re.search(target_pattern, content):
-            new_content = re.sub(target_pattern, replacement, content)
-            self.backlog_path.write_text(new_content, encoding="utf-8")
-            print(f"📝 Marked {paper_id} as Dispatched in backlog.")
-        else:
-            # Fallback
-            target_v2 = f"### [ ] Paper {paper_id}"
-            if target_v2 in content:
-                new_content = content.replace(target_v2, f"### [/] Paper {paper_id}")
-                self.backlog_path.write_text(new_content, encoding="utf-8")
+    def rollback(self) -> None:
+        """Drops only the marks buffered by the transaction being rolled back."""
+        del self._dispatched[self._txn_start or 0:]
+
+    def _lookup(self, paper_id: str) -> Optional[BacklogEntry]:
+        entry = self._index.get(paper_id)
+        while entry is None and not self._scan_complete:
+            self._scan(stop_after_pending=1)
+            entry = self._index.get(paper_id)
+        return entry
+
+    def flush(self) -> None:
+        if not self._dispatched or not self.backlog_path.exists():
+            return
+        # Someone else edited the backlog since we indexed it: re-index before patching
+        if self._stamp != self._file_stamp():
+            self._reset_index()
+
+        edits = []  # (offset, old bytes, new bytes)
+        for paper_id in dict.fromkeys(self._dispatched):
+            entry = self._lookup(paper_id)
+            if entry is None or entry.mark != " ":
+                continue
+            header = entry.header.replace(b"### [ ]", b"### [/]", 1)
+            edits.append((entry.header_offset, entry.header, header))
+            if entry.status_line is not None and entry.status_offset == entry.header_offset + len(entry.header) \
+                    and entry.status_line.startswith(PENDING_STATUS.encode("utf-8")):
+                status = entry.status_line.replace(PENDING_STATUS.encode("utf-8"), DISPATCHED_STATUS.encode("utf-8"), 1)
+                edits.append((entry.status_offset, entry.status_line, status))
+                print(f"📝 Marked {paper_id} as Dispatched in backlog.")
+            else:
                 print(f"📝 Marked {paper_id} as Dispatched (fallback).")
+        if not edits:
+            self._dispatched = []
+            return
+
+        content = self.backlog_path.read_bytes()
+        parts, cursor = [], 0
+        for offset, old, new in sorted(edits):
+            parts.append(content[cursor:offset])
+            parts.append(new)
+            cursor = offset + len(old)
+        parts.append(content[cursor:])
+        atomic_write(self.backlog_path, b"".join(parts))
+        self._dispatched = []
+
+        # Offsets after the first edit have shifted; start a fresh index on next use
+        self._reset_index()
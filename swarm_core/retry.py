@@ -0,0 +1,153 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from .config import SwarmConfig
+
+# Statuses worth another try: throttling and server-side trouble
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Statuses that prove the server did not act on the request, so even a POST can be resent
+NOT_PROCESSED_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header (delta-seconds or HTTP-date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honouring Retry-After.
+
+    Non-idempotent requests (POSTs, unless the caller says otherwise) are
+    only retried when the failure proves nothing happened server-side: a
+    429/503 rejection or a connection that never opened. A timeout or 500
+    after a POST may have created the session, so it is surfaced instead.
+    """
+
+    def __init__(self, max_attempts: int = 4, base_delay: float = 0.5,
+                 max_delay: float = 30.0, multiplier: float = 2.0,
+                 max_retry_after: float = 120.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.max_retry_after = max_retry_after
+
+    @classmethod
+    def from_config(cls, config: SwarmConfig) -> "RetryPolicy":
+        return cls(max_attempts=config.retry_attempts, base_delay=config.retry_base_delay,
+                   max_delay=config.retry_max_delay)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * self.multiplier ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+    def next_delay(self, attempt: int, status: Optional[int], sent: bool, idempotent: bool,
+                   retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before trying again, or None to give up.
+
+        `attempt` is the number of attempts made so far; `status` is None for
+        transport errors, with `sent` telling whether the request went out.
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if status is not None and status not in RETRYABLE_STATUSES:
+            return None
+        if not idempotent and sent and status not in NOT_PROCESSED_STATUSES:
+            return None
+        if retry_after is not None:
+            if retry_after > self.max_retry_after:
+                return None
+            return retry_after + random.uniform(0, self.base_delay)
+        return self.backoff(attempt)
+
+
+class CircuitBreaker:
+    """Closed -> open after `threshold` consecutive failures -> half-open probe.
+
+    While open, requests fail fast instead of reaching the API. After the
+    open period one probe is let through; success closes the circuit,
+    failure re-opens it for twice as long (up to `max_reset`).
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0, max_reset: float = 600.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset = max_reset
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.open_until = 0.0
+        self._probing = False
+
+    def check(self) -> Optional[float]:
+        """Returns None if a request may go out, else seconds until it may."""
+        if self.state == self.CLOSED:
+            return None
+        now = time.monotonic()
+        if self.state == self.OPEN:
+            if now < self.open_until:
+                return self.open_until - now
+            self.state = self.HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return max(0.1, self.reset_timeout / 10)
+        self._probing = True
+        return None
+
+    def success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self._probing = False
+
+    def failure(self) -> bool:
+        """Counts a failure. Returns True if this opened the circuit."""
+        self.failures += 1
+        self._probing = False
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            self.opened += 1
+            self.state = self.OPEN
+            self.open_until = time.monotonic() + min(self.max_reset, self.reset_timeout * 2 ** (self.opened - 1))
+            return True
+        return False
+
+
+class CircuitBreakers:
+    """One CircuitBreaker per (key, endpoint), created on first use."""
+
+    def __init__(self, threshold: int = 5, reset_timeout: float = 30.0, max_reset: float = 600.0):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset = max_reset
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    @classmethod
+    def from_config(cls, config: SwarmConfig) -> "CircuitBreakers":
+        return cls(threshold=config.breaker_threshold, reset_timeout=config.breaker_reset)
+
+    def get(self, api_key: str, endpoint: str) -> CircuitBreaker:
+        breaker = self._breakers.get((api_key, endpoint))
+        if breaker is None:
+            breaker = CircuitBreaker(self.threshold, self.reset_timeout, self.max_reset)
+            self._breakers[(api_key, endpoint)] = breaker
+        return breaker
+
+    def open_circuits(self) -> Dict[Tuple[str, str], float]:
+        now = time.monotonic()
+        return {k: round(b.open_until - now, 1) for k, b in self._breakers.items()
+                if b.state == CircuitBreaker.OPEN and b.open_until > now}
@@ -0,0 +1,248 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+# Statuses that mean the key itself is unusable (revoked, disabled, no quota project)
+REVOKED_STATUSES = {401, 403}
+
+# How often keys vetoed by an `admit` check are looked at again (seconds)
+ADMIT_RECHECK = 0.05
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def available(self, now: float) -> float:
+        self._refill(now)
+        return self.tokens
+
+    def take(self, now: float) -> bool:
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until one token is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class KeyHealth:
+    """Rate and health state for a single API key."""
+
+    def __init__(self, index: int, key: str, rate: float, burst: float, window: float):
+        self.index = index
+        self.key = key
+        self.bucket = TokenBucket(rate, burst)
+        self.window = window
+        self.pending = 0
+        self.cooldown_until = 0.0
+        self.disabled = False
+        self.consecutive_throttles = 0
+        self.consecutive_errors = 0
+        self.last_used = 0.0
+        # (timestamp, outcome, latency) where outcome is "ok", "throttled" or "error"
+        self.recent: Deque[Tuple[float, str, float]] = deque()
+
+    def _trim(self, now: float):
+        while self.recent and now - self.recent[0][0] > self.window:
+            self.recent.popleft()
+
+    def counts(self, now: float) -> Dict[str, int]:
+        self._trim(now)
+        counts = {"ok": 0, "throttled": 0, "error": 0}
+        for _, outcome, _ in self.recent:
+            counts[outcome] += 1
+        return counts
+
+    def avg_latency(self, now: float) -> float:
+        self._trim(now)
+        if not self.recent:
+            return 0.0
+        return sum(latency for _, _, latency in self.recent) / len(self.recent)
+
+    def is_available(self, now: float) -> bool:
+        return not self.disabled and now >= self.cooldown_until
+
+    def headroom(self, now: float) -> float:
+        """Higher is better: spare tokens, penalised by recent trouble and slowness."""
+        counts = self.counts(now)
+        return (self.bucket.available(now) - self.pending
+                - 2.0 * counts["throttled"]
+                - 1.0 * counts["error"]
+                - self.avg_latency(now))
+
+
+class Reservation:
+    """A key handed out by `KeyScheduler.acquire()`, counted as pending until settled.
+
+    It is settled exactly once: consumed by the `throttle()` call that
+    paces the request it was taken for, or released unused. Settling
+    again is a no-op, so callers can release in a `finally` regardless.
+    """
+
+    def __init__(self, health: KeyHealth):
+        self._health = health
+        self.settled = False
+
+    @property
+    def key(self) -> str:
+        return self._health.key
+
+    def release(self):
+        if not self.settled:
+            self.settled = True
+            self._health.pending -= 1
+
+
+class KeyScheduler:
+    """Routes calls to the API key with the most headroom.
+
+    Every key has a token bucket; `acquire()` reserves the best key and
+    `throttle()` spends one of its tokens right before a request goes out.
+    Only requests that pass the reservation to `throttle()` settle it;
+    retries, polls and other direct calls just spend tokens. Outcomes are
+    fed back through `record()`, which sidelines throttled or failing keys
+    for a cool-down and disables revoked ones for the rest of the process.
+    """
+
+    def __init__(self, keys: List[str], rate: float = 1.0, burst: float = 5.0,
+                 window: float = 60.0, cooldown: float = 15.0,
+                 max_cooldown: float = 300.0, error_threshold: int = 3):
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.error_threshold = error_threshold
+        self.keys: List[KeyHealth] = [KeyHealth(i, k, rate, burst, window) for i, k in enumerate(keys)]
+        self._by_key: Dict[str, KeyHealth] = {h.key: h for h in self.keys}
+
+    def index_of(self, api_key: str) -> int:
+        return self._by_key[api_key].index
+
+    def _usable(self) -> List[KeyHealth]:
+        if not self.keys:
+            raise ValueError("No JULES_API_KEYS found in environment or .env file.")
+        usable = [h for h in self.keys if not h.disabled]
+        if not usable:
+            raise RuntimeError("All API keys are disabled (401/403 from the API).")
+        return usable
+
+    async def acquire(self, admit: Optional[Callable[[str], bool]] = None) -> Reservation:
+        """Waits for the key with the most headroom and reserves it.
+
+        `admit` can veto keys that have tokens but no spare capacity for
+        the caller (e.g. an in-flight limit); those are re-checked shortly.
+        The caller must pass the reservation to the request (which consumes
+        it) or `release()` it.
+        """
+        while True:
+            now = time.monotonic()
+            usable = self._usable()
+            ready = [h for h in usable if h.is_available(now)
+                     and h.bucket.available(now) - h.pending >= 1]
+            admitted = [h for h in ready if admit is None or admit(h.key)]
+            if admitted:
+                best = max(admitted, key=lambda h: (h.headroom(now), -h.last_used))
+                best.pending += 1
+                best.last_used = now
+                return Reservation(best)
+
+            # Keys vetoed by `admit` are rechecked shortly; the rest once they have a token
+            waits = [ADMIT_RECHECK] if ready else []
+            for h in usable:
+                if h in ready:
+                    continue
+                until_cool = max(0.0, h.cooldown_until - now)
+                until_token = (h.pending + 1 - h.bucket.available(now)) / h.bucket.rate
+                waits.append(max(until_cool, until_token))
+            await asyncio.sleep(max(0.01, min(waits)))
+
+    async def throttle(self, api_key: str, reservation: Optional[Reservation] = None) -> bool:
+        """Spends one token of `api_key`, waiting for cool-down and refill if needed.
+
+        Consumes `reservation` if given. Returns False, without spending
+        anything, if the key is (or gets) disabled: the request must not go out.
+        """
+        if reservation is not None:
+            reservation.release()
+        health = self._by_key.get(api_key)
+        if health is None:
+            return True
+        while not health.disabled:
+            now = time.monotonic()
+            if health.is_available(now):
+                if health.bucket.take(now):
+                    return True
+                await asyncio.sleep(health.bucket.wait_time(now))
+            else:
+                await asyncio.sleep(health.cooldown_until - now)
+        return False
+
+    def record(self, api_key: str, status: Optional[int], latency: float,
+               retry_after: Optional[float] = None):
+        """Feeds the outcome of one request back into the key's health."""
+        health = self._by_key.get(api_key)
+        if health is None:
+            return
+        now = time.monotonic()
+
+        if status in REVOKED_STATUSES:
+            health.recent.append((now, "error", latency))
+            if not health.disabled:
+                health.disabled = True
+                print(f"🚫 Key #{health.index + 1} rejected (HTTP {status}); disabling it for this run.")
+            return
+
+        if status == 429:
+            health.recent.append((now, "throttled", latency))
+            health.consecutive_throttles += 1
+            delay = retry_after if retry_after is not None else min(
+                self.max_cooldown, self.cooldown * 2 ** (health.consecutive_throttles - 1))
+            health.cooldown_until = max(health.cooldown_until, now + delay)
+            return
+
+        if status is not None and status < 500:
+            # Success, or a bad request (404, 400, 409) that the key served just fine
+            health.recent.append((now, "ok", latency))
+            health.consecutive_throttles = 0
+            health.consecutive_errors = 0
+            return
+
+        # 5xx and transport errors (status None)
+        health.recent.append((now, "error", latency))
+        health.consecutive_errors += 1
+        if retry_after is not None or health.consecutive_errors >= self.error_threshold:
+            delay = retry_after if retry_after is not None else min(
+                self.max_cooldown, self.cooldown * 2 ** (health.consecutive_errors - self.error_threshold))
+            health.cooldown_until = max(health.cooldown_until, now + delay)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-key health summary for reporting."""
+        now = time.monotonic()
+        rows = []
+        for h in self.keys:
+            counts = h.counts(now)
+            rows.append({
+                "key": h.index + 1,
+                "ok": counts["ok"],
+                "throttled": counts["throttled"],
+                "errors": counts["error"],
+                "avg_latency": round(h.avg_latency(now), 3),
+                "cooling_for": round(max(0.0, h.cooldown_until - now), 1),
+                "disabled": h.disabled,
+            })
+        return rows
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+from .files import atomic_write_json
+
+DEFAULT_SOURCE_TTL = 24 * 3600
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Stable, non-reversible identifier for an API key (keys never hit disk)."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class SourceCache:
+    """Repo -> Jules source name map per API key, persisted with a TTL.
+
+    Layout on disk: {fingerprint: {"owner/repo": {"name": ..., "fetchedAt": epoch}}}.
+    Pass `path=None` for a purely in-memory cache.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None, ttl: float = DEFAULT_SOURCE_TTL):
+        self.path = Path(path) if path else None
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, Dict]] = self._read()
+        self._dirty = False
+
+    def _read(self) -> Dict[str, Dict[str, Dict]]:
+        if not self.path or not self.path.exists():
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            print(f"⚠️  Ignoring unreadable source cache at {self.path}")
+            return {}
+
+    def get(self, api_key: str, repo_name: str) -> Optional[str]:
+        entry = self._entries.get(key_fingerprint(api_key), {}).get(repo_name.lower())
+        if not entry or time.time() - entry.get("fetchedAt", 0) > self.ttl:
+            return None
+        return entry["name"]
+
+    def put(self, api_key: str, repo_name: str, source_name: str):
+        bucket = self._entries.setdefault(key_fingerprint(api_key), {})
+        bucket[repo_name.lower()] = {"name": source_name, "fetchedAt": time.time()}
+        self._dirty = True
+
+    def save(self):
+        """Merges with whatever is on disk (newest entry wins) and writes atomically."""
+        if not self.path or not self._dirty:
+            return
+        merged = self._read()
+        for fingerprint, repos in self._entries.items():
+            bucket = merged.setdefault(fingerprint, {})
+            for repo, entry in repos.items():
+                if entry.get("fetchedAt", 0) >= bucket.get(repo, {}).get("fetchedAt", 0):
+                    bucket[repo] = entry
+        self._entries = merged
+
+        atomic_write_json(self.path, merged)
+        self._dirty = False
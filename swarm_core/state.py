@@ -0,0 +1,326 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+# Record keys (the historical sessions.json shape) -> table columns
+COLUMNS = {
+    "sessionId": "session_id",
+    "component": "component",
+    "title": "title",
+    "status": "status",
+    "state": "state",
+    "keyIndex": "key_index",
+    "startTime": "start_time",
+    "repo": "repo",
+    "promptHash": "prompt_hash",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    component  TEXT,
+    title      TEXT,
+    status     TEXT,
+    state      TEXT,
+    key_index  INTEGER,
+    start_time TEXT,
+    repo       TEXT,
+    prompt_hash TEXT,
+    updated_at REAL NOT NULL,
+    extra      TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_component ON sessions(component);
+CREATE INDEX IF NOT EXISTS idx_sessions_state ON sessions(state);
+CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status);
+"""
+
+# Columns added after the first release of the schema, with their backfill
+MIGRATIONS = {
+    "repo": "UPDATE sessions SET repo = json_extract(extra, '$.repo') WHERE repo IS NULL",
+    "prompt_hash": None,
+}
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_sessions_prompt ON sessions(repo, prompt_hash);
+"""
+
+# Synced session activities, and how far each session's sync has got
+ACTIVITY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS activities (
+    session_id  TEXT NOT NULL,
+    activity_id TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    create_time TEXT,
+    payload     TEXT NOT NULL,
+    PRIMARY KEY (session_id, activity_id)
+);
+CREATE INDEX IF NOT EXISTS idx_activities_seq ON activities(session_id, seq);
+CREATE TABLE IF NOT EXISTS activity_cursors (
+    session_id TEXT PRIMARY KEY,
+    page_token TEXT,
+    last_id    TEXT,
+    count      INTEGER NOT NULL DEFAULT 0,
+    done       INTEGER NOT NULL DEFAULT 0,
+    synced_at  REAL NOT NULL
+);
+"""
+
+
+# Rows written before ids were normalised ("123" rather than "sessions/123")
+ID_MIGRATIONS = """
+UPDATE OR IGNORE sessions SET session_id = 'sessions/' || session_id WHERE session_id NOT LIKE 'sessions/%';
+DELETE FROM sessions WHERE session_id NOT LIKE 'sessions/%';
+UPDATE OR IGNORE activities SET session_id = 'sessions/' || session_id WHERE session_id NOT LIKE 'sessions/%';
+DELETE FROM activities WHERE session_id NOT LIKE 'sessions/%';
+UPDATE OR IGNORE activity_cursors SET session_id = 'sessions/' || session_id WHERE session_id NOT LIKE 'sessions/%';
+DELETE FROM activity_cursors WHERE session_id NOT LIKE 'sessions/%';
+"""
+
+
+def session_name(session_id: str) -> str:
+    """Canonical id of a session, "sessions/123", whether given as "123" or "sessions/123"."""
+    return f"sessions/{session_id.rsplit('/', 1)[-1]}"
+
+
+class SessionStore:
+    """Indexed session state in SQLite (WAL mode).
+
+    Records are plain dicts in the same shape sessions.json always used
+    (`sessionId`, `component`, `title`, `startTime`, `status`, ...); keys
+    without a dedicated column are kept in a JSON `extra` blob. WAL plus a
+    busy timeout lets several runners read and write the same file at once.
+
+    Every table is keyed by the API's session name ("sessions/123"); the
+    methods accept a bare id too and normalise it with `session_name`.
+
+    Calls are synchronous and may wait on the SQLite busy timeout. They
+    are thread-safe, so async code on a hot path (activity sync, polling
+    loops) runs them with `asyncio.to_thread` instead of on the event loop.
+    """
+
+    def __init__(self, path: Union[str, Path], timeout: float = 30.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=timeout,
+                                     check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(timeout * 1000)}")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._conn.executescript(INDEXES)
+        self._conn.executescript(ACTIVITY_SCHEMA)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._conn.executescript(ID_MIGRATIONS)
+            self._conn.execute("PRAGMA user_version = 1")
+
+    def _migrate(self):
+        existing = {row["name"] for row in self._conn.execute("PRAGMA table_info(sessions)")}
+        for column, backfill in MIGRATIONS.items():
+            if column in existing:
+                continue
+            try:
+                self._conn.execute(f"ALTER TABLE sessions ADD COLUMN {column} TEXT")
+            except sqlite3.OperationalError:
+                continue  # another process migrated first
+            if backfill:
+                self._conn.execute(backfill)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _to_row(record: Dict[str, Any]) -> Dict[str, Any]:
+        row = {column: record.get(key) for key, column in COLUMNS.items()}
+        row["session_id"] = session_name(row["session_id"])
+        row["extra"] = json.dumps({k: v for k, v in record.items() if k not in COLUMNS})
+        row["updated_at"] = time.time()
+        return row
+
+    @staticmethod
+    def _to_record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = json.loads(row["extra"] or "{}")
+        for key, column in COLUMNS.items():
+            if row[column] is not None:
+                record[key] = row[column]
+        return record
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Inserts or merges records in one transaction. None values never overwrite."""
+        rows = [self._to_row(r) for r in records]
+        if not rows:
+            return 0
+        columns = list(COLUMNS.values())
+        assignments = ", ".join(f"{c} = COALESCE(excluded.{c}, {c})" for c in columns if c != "session_id")
+        sql = (f"INSERT INTO sessions ({', '.join(columns)}, updated_at, extra) "
+               f"VALUES ({', '.join(':' + c for c in columns)}, :updated_at, :extra) "
+               f"ON CONFLICT(session_id) DO UPDATE SET {assignments}, "
+               f"updated_at = excluded.updated_at, "
+               f"extra = json_patch(extra, excluded.extra)")
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def upsert(self, record: Dict[str, Any]):
+        self.upsert_many([record])
+
+    def update(self, session_id: str, **fields):
+        """Merges `fields` (record keys, e.g. state="COMPLETED") into one session."""
+        self.upsert({"sessionId": session_id, **fields})
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM sessions WHERE session_id = ?",
+                                     (session_name(session_id),)).fetchone()
+        return self._to_record(row) if row else None
+
+    def query(self, component_prefix: Optional[str] = None,
+              states: Optional[Iterable[str]] = None,
+              exclude_states: Optional[Iterable[str]] = None,
+              status: Optional[str] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Filtered listing, oldest first.
+
+        Prefix matching is a case-sensitive range scan on the component index
+        (LIKE is case-insensitive, so SQLite could not use the index for it).
+        """
+        clauses, params = [], []
+        if component_prefix:
+            # Every string starting with the prefix sorts in [prefix, prefix with its last char bumped)
+            successor = component_prefix[:-1] + chr(ord(component_prefix[-1]) + 1)
+            clauses.append("component >= ? AND component < ?")
+            params.extend([component_prefix, successor])
+        if states is not None:
+            states = list(states)
+            clauses.append(f"state IN ({', '.join('?' * len(states))})")
+            params.extend(states)
+        if exclude_states is not None:
+            exclude_states = list(exclude_states)
+            clauses.append(f"(state IS NULL OR state NOT IN ({', '.join('?' * len(exclude_states))}))")
+            params.extend(exclude_states)
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+
+        sql = "SELECT * FROM sessions"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY start_time, rowid"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._to_record(r) for r in rows]
+
+    def find_by_prompt(self, repo: str, prompt_hash: str,
+                       exclude_states: Iterable[str] = ()) -> Optional[Dict[str, Any]]:
+        """Returns the newest session that ran this exact prompt against `repo`."""
+        exclude_states = list(exclude_states)
+        sql = "SELECT * FROM sessions WHERE repo = ? AND prompt_hash = ?"
+        params: List[Any] = [repo, prompt_hash]
+        if exclude_states:
+            sql += f" AND (state IS NULL OR state NOT IN ({', '.join('?' * len(exclude_states))}))"
+            params.extend(exclude_states)
+        sql += " ORDER BY start_time DESC LIMIT 1"
+        with self._lock:
+            row = self._conn.execute(sql, params).fetchone()
+        return self._to_record(row) if row else None
+
+    def activity_cursor(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Where the last activity sync of `session_id` stopped, or None if it never ran."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM activity_cursors WHERE session_id = ?",
+                                     (session_name(session_id),)).fetchone()
+        if row is None:
+            return None
+        return {"pageToken": row["page_token"], "lastId": row["last_id"], "count": row["count"],
+                "done": bool(row["done"]), "syncedAt": row["synced_at"]}
+
+    def add_activities(self, session_id: str, activities: List[Dict[str, Any]],
+                       page_token: Optional[str], done: bool = False) -> List[Dict[str, Any]]:
+        """Appends newly seen activities and moves the cursor, in one transaction.
+
+        `page_token` is the token that fetched the last page read, so the
+        next sync can resume there. Returns the activities that were not
+        stored yet.
+        """
+        session_id = session_name(session_id)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT count, last_id FROM activity_cursors WHERE session_id = ?",
+                                         (session_id,)).fetchone()
+                count, last_id = (row["count"], row["last_id"]) if row else (0, None)
+                added: List[Dict[str, Any]] = []
+                for activity in activities:
+                    cursor = self._conn.execute(
+                        "INSERT OR IGNORE INTO activities (session_id, activity_id, seq, create_time, payload) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (session_id, activity.get("name"), count + len(added), activity.get("createTime"),
+                         json.dumps(activity)))
+                    if cursor.rowcount:
+                        added.append(activity)
+                    last_id = activity.get("name") or last_id
+                self._conn.execute(
+                    "INSERT INTO activity_cursors (session_id, page_token, last_id, count, done, synced_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(session_id) DO UPDATE SET "
+                    "page_token = excluded.page_token, last_id = excluded.last_id, count = excluded.count, "
+                    "done = excluded.done, synced_at = excluded.synced_at",
+                    (session_id, page_token, last_id, count + len(added), int(done), time.time()))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def activities(self, session_id: str, after: int = 0, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Synced activities of a session in API order, skipping the first `after`."""
+        sql = "SELECT payload FROM activities WHERE session_id = ? AND seq >= ? ORDER BY seq"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, (session_name(session_id), after)).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def import_json(self, json_path: Union[str, Path]) -> int:
+        """Imports a legacy sessions.json array. Safe to run more than once."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        return self.upsert_many(r for r in records if r.get("sessionId"))
+
+    def export_json(self, json_path: Union[str, Path]):
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(self.query(), f, indent=2)
+
+
+def open_session_store(state_dir: Union[str, Path]) -> SessionStore:
+    """Opens `state_dir/sessions.db`, importing `state_dir/sessions.json` on first use."""
+    state_dir = Path(state_dir)
+    store = SessionStore(state_dir / "sessions.db")
+    legacy = state_dir / "sessions.json"
+    if store.count() == 0 and legacy.exists():
+        imported = store.import_json(legacy)
+        print(f"📥 Imported {imported} sessions from {legacy} into {store.path}")
+    return store
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from .activities import ActivitySync
+from .api import AsyncJulesAPI, JulesAPIError, client_from_config
+from .config import SwarmConfig
+from .journal import parse_time
+from .poller import StatusPoller, apply_states, is_terminal
+from .state import SessionStore
+
+AWAITING_PLAN_APPROVAL = "AWAITING_PLAN_APPROVAL"
+AWAITING_USER_FEEDBACK = "AWAITING_USER_FEEDBACK"
+
+# Why a session was flagged
+PLAN, FEEDBACK, IDLE = "plan", "feedback", "idle"
+
+DEFAULT_NUDGE = "Please continue with the task. If you are blocked, make a reasonable assumption and proceed."
+
+
+class StuckSession:
+    def __init__(self, session: Dict[str, Any], reason: str, idle_for: Optional[float]):
+        self.session = session
+        self.reason = reason
+        self.idle_for = idle_for
+
+    @property
+    def session_id(self) -> str:
+        return self.session["sessionId"]
+
+    def describe(self) -> str:
+        idle = f", idle {self.idle_for / 60:.0f} min" if self.idle_for is not None else ""
+        return f"{self.session.get('component', 'N/A')} ({self.session_id}): {self.reason}{idle}"
+
+
+class StuckDetector:
+    """Finds sessions that hold a slot without making progress, and unblocks them.
+
+    A running session is stuck if it waits for plan approval, waits for
+    user feedback, or has produced no activity for `idle_threshold`
+    seconds. States come from the StatusPoller (list pages) and activity
+    times from the incremental ActivitySync, so a scan over thousands of
+    sessions costs a few pages plus the activity delta.
+
+    `nudge()` approves waiting plans and sends `send_input` to the rest.
+    Each key works through its own sessions one at a time, `pace` seconds
+    apart, while keys proceed in parallel.
+    """
+
+    def __init__(self, api: AsyncJulesAPI, store: SessionStore, api_keys: List[str],
+                 idle_threshold: float = 3600.0, concurrency: int = 16, pace: float = 1.0):
+        self.api = api
+        self.store = store
+        self.api_keys = api_keys
+        self.idle_threshold = idle_threshold
+        self.concurrency = max(1, concurrency)
+        self.pace = pace
+        self.sync = ActivitySync(api, store, api_keys, concurrency)
+
+    def _last_seen(self, session: Dict[str, Any], details: Optional[Dict[str, Any]]) -> Optional[datetime]:
+        sid = session["sessionId"]
+        count = (self.store.activity_cursor(sid) or {}).get("count", 0)
+        last = self.store.activities(sid, after=count - 1) if count else []
+        if last:
+            return parse_time(last[-1].get("createTime"))
+        # No activity yet: fall back to when the API last touched the session
+        if details:
+            return parse_time(details.get("updateTime") or details.get("createTime"))
+        return None
+
+    async def scan(self, sessions: List[Dict[str, Any]], refresh: bool = True) -> List[StuckSession]:
+        """Flags stuck sessions. With `refresh=False`, the records' `state` is trusted as current."""
+        details: Dict[str, Optional[Dict[str, Any]]] = {}
+        with self.api.metrics.span("stuck.scan", sessions=len(sessions)) as span:
+            if refresh:
+                poll = await StatusPoller(self.api, self.api_keys, self.concurrency).poll(sessions)
+                await asyncio.to_thread(self.store.upsert_many, apply_states(sessions, poll))
+                details = poll.details
+            active = [s for s in sessions if not is_terminal(s.get("state"))]
+            await self.sync.sync_many(active)
+
+            now = datetime.now(timezone.utc)
+            seen = await asyncio.to_thread(
+                lambda: [self._last_seen(s, details.get(s["sessionId"])) for s in active])
+            stuck = []
+            for session, last_seen in zip(active, seen):
+                idle_for = (now - last_seen).total_seconds() if last_seen else None
+                state = (session.get("state") or "").upper()
+                if state == AWAITING_PLAN_APPROVAL:
+                    stuck.append(StuckSession(session, PLAN, idle_for))
+                elif state == AWAITING_USER_FEEDBACK:
+                    stuck.append(StuckSession(session, FEEDBACK, idle_for))
+                elif idle_for is not None and idle_for >= self.idle_threshold:
+                    stuck.append(StuckSession(session, IDLE, idle_for))
+            span.update(active=len(active), stuck=len(stuck))
+        return stuck
+
+    async def nudge(self, stuck: List[StuckSession], message: str = DEFAULT_NUDGE,
+                    approve_plans: bool = True, dry_run: bool = False) -> Dict[str, int]:
+        """Unblocks `stuck` sessions. Returns counts of approved, nudged and failed."""
+        counts = {"approved": 0, "nudged": 0, "failed": 0}
+        by_key: Dict[int, List[StuckSession]] = {}
+        for i, item in enumerate(stuck):
+            index = item.session.get("keyIndex")
+            if not (isinstance(index, int) and 0 <= index < len(self.api_keys)):
+                index = i % len(self.api_keys)
+            by_key.setdefault(index, []).append(item)
+
+        async def work(index: int, items: List[StuckSession]):
+            api_key = self.api_keys[index]
+            for n, item in enumerate(items):
+                if n:
+                    await asyncio.sleep(self.pace)
+                approve = approve_plans and item.reason == PLAN
+                action = "Approving plan of" if approve else "Nudging"
+                print(f"{'[DRY-RUN] ' if dry_run else ''}👉 {action} {item.describe()} (Key #{index + 1})")
+                if dry_run:
+                    continue
+                try:
+                    if approve:
+                        await self.api.approve_plan(api_key, item.session_id)
+                        counts["approved"] += 1
+                    else:
+                        await self.api.send_input(api_key, item.session_id, message)
+                        counts["nudged"] += 1
+                except JulesAPIError as e:
+                    print(f"❌ Could not unblock {item.session_id}: {e}")
+                    counts["failed"] += 1
+
+        started = time.monotonic()
+        with self.api.metrics.span("stuck.nudge", sessions=len(stuck), keys=len(by_key)) as span:
+            await asyncio.gather(*(work(index, items) for index, items in by_key.items()))
+            span.update(**counts)
+        print(f"✅ {counts['approved']} plans approved, {counts['nudged']} sessions nudged, "
+              f"{counts['failed']} failed in {time.monotonic() - started:.1f}s.")
+        return counts
+
+
+def poke_stuck_sessions(config: SwarmConfig, store: SessionStore, sessions: List[Dict[str, Any]],
+                        idle_threshold: float = 3600.0, message: str = DEFAULT_NUDGE,
+                        refresh: bool = True, approve_plans: bool = True, dry_run: bool = False,
+                        concurrency: int = 16, pace: float = 1.0) -> Tuple[List[StuckSession], Dict[str, int]]:
+    """Blocking helper for runners: scans `sessions` and unblocks the stuck ones."""
+    async def run():
+        async with client_from_config(config, pool_size=concurrency) as api:
+            detector = StuckDetector(api, store, config.api_keys, idle_threshold, concurrency, pace)
+            stuck = await detector.scan(sessions, refresh=refresh)
+            print(f"🩺 {len(stuck)} of {len(sessions)} sessions look stuck.")
+            if not stuck:
+                return stuck, {"approved": 0, "nudged": 0, "failed": 0}
+            return stuck, await detector.nudge(stuck, message, approve_plans=approve_plans, dry_run=dry_run)
+
+    return asyncio.run(run())
@@ -0,0 +1,99 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from .api import client_from_config
+from .config import SwarmConfig
+from .poller import StatusPoller, apply_states, is_terminal
+from .state import SessionStore
+
+
+class WatchResult:
+    def __init__(self, total: int):
+        self.total = total
+        self.terminal = 0
+        self.rounds = 0
+        self.elapsed = 0.0
+        self.timed_out = False
+
+    @property
+    def share(self) -> float:
+        return self.terminal / self.total if self.total else 1.0
+
+    def summary(self) -> str:
+        outcome = "timed out" if self.timed_out else "threshold reached"
+        return (f"👀 {self.terminal}/{self.total} sessions terminal ({self.share:.0%}) after "
+                f"{self.rounds} polls in {self.elapsed:.0f}s ({outcome}).")
+
+
+class SessionWatcher:
+    """Polls sessions until a share of them reaches a terminal state.
+
+    The poll interval starts at `min_interval` and grows by `backoff`
+    every round in which nothing changed, up to `max_interval`; any state
+    change snaps it back down, so bursts of completions are noticed fast
+    while a quiet swarm costs few requests.
+    """
+
+    def __init__(self, poller: StatusPoller, store: Optional[SessionStore] = None,
+                 min_interval: float = 30.0, max_interval: float = 900.0, backoff: float = 1.5):
+        self.poller = poller
+        self.store = store
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+
+    async def refresh(self, sessions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Polls `sessions` once, updating them (and the store) in place. Returns the changed ones."""
+        poll = await self.poller.poll(sessions)
+        changed = apply_states(sessions, poll)
+        if self.store is not None and changed:
+            await asyncio.to_thread(self.store.upsert_many, changed)
+        return changed
+
+    def next_interval(self, interval: float, changed: bool) -> float:
+        return self.min_interval if changed else min(self.max_interval, interval * self.backoff)
+
+    async def watch(self, sessions: List[Dict[str, Any]], threshold: float = 0.8,
+                    max_wait: Optional[float] = None) -> WatchResult:
+        with self.poller.api.metrics.span("watch", sessions=len(sessions), threshold=threshold) as span:
+            result = await self._watch(sessions, threshold, max_wait)
+            span.update(rounds=result.rounds, terminal=result.terminal, timed_out=result.timed_out)
+        return result
+
+    async def _watch(self, sessions: List[Dict[str, Any]], threshold: float,
+                     max_wait: Optional[float]) -> WatchResult:
+        result = WatchResult(len(sessions))
+        started = time.monotonic()
+        interval = self.min_interval
+
+        while True:
+            changed = await self.refresh(sessions)
+            result.rounds += 1
+            result.terminal = sum(1 for s in sessions if is_terminal(s.get("state")))
+            result.elapsed = time.monotonic() - started
+            if result.share >= threshold:
+                return result
+
+            remaining = None if max_wait is None else max_wait - result.elapsed
+            if remaining is not None and remaining <= 0:
+                result.timed_out = True
+                return result
+
+            interval = self.next_interval(interval, bool(changed))
+            delay = interval if remaining is None else min(interval, remaining)
+            print(f"👀 {result.terminal}/{result.total} terminal ({result.share:.0%}, "
+                  f"{len(changed)} changed); next check in {delay:.0f}s.")
+            await asyncio.sleep(delay)
+
+
+def watch_sessions(config: SwarmConfig, store: SessionStore, sessions: List[Dict[str, Any]],
+                   threshold: float = 0.8, max_wait: Optional[float] = None,
+                   concurrency: int = 16, **watcher_options) -> WatchResult:
+    """Blocking helper: watches `sessions` with a fresh pooled client."""
+    async def run():
+        async with client_from_config(config, pool_size=concurrency) as api:
+            watcher = SessionWatcher(StatusPoller(api, config.api_keys, concurrency), store, **watcher_options)
+            return await watcher.watch(sessions, threshold=threshold, max_wait=max_wait)
+
+    return asyncio.run(run())
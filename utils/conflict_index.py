@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, Set
+
+
+class ConflictIndex:
+    """Changed-path index over a set of open PRs.
+
+    Built once from the bulk PR listing (each PR needs `number`, `files`
+    and `created_at`). Two PRs are neighbours when they change a common
+    path, so they must not merge at the same time: the newer one goes
+    after the older one has landed (and may then need a rebase).
+    """
+
+    def __init__(self, prs: Iterable):
+        self.prs = {pr.number: pr for pr in prs}
+        self.by_path: Dict[str, Set[int]] = {}
+        for pr in self.prs.values():
+            for path in pr.files:
+                self.by_path.setdefault(path, set()).add(pr.number)
+
+    def neighbours(self, number: int) -> Set[int]:
+        found: Set[int] = set()
+        for path in self.prs[number].files:
+            found |= self.by_path[path]
+        found.discard(number)
+        return found
+
+    def touching(self, paths: Set[str]) -> Set[int]:
+        """PRs that change any of `paths`."""
+        found: Set[int] = set()
+        for path in paths:
+            found |= self.by_path.get(path, set())
+        return found
+
+    def select_batch(self, candidates: List) -> List:
+        """Picks the PRs at the head of their path queues.
+
+        Every path orders the candidates that change it oldest first; a PR
+        is picked once it is first in all of its queues, i.e. no older
+        candidate overlaps it. The batch is pairwise non-overlapping, and
+        overlapping PRs go in creation order over successive batches.
+        """
+        order = sorted(candidates, key=lambda pr: (pr.created_at, pr.number))
+        batch, seen = [], set()
+        for pr in order:
+            if not self.neighbours(pr.number) & seen:
+                batch.append(pr)
+            seen.add(pr.number)
+        return batch
+
+    def clusters(self, numbers: Iterable[int]) -> List[List[int]]:
+        """Connected components of the overlap graph restricted to `numbers`."""
+        remaining = set(numbers)
+        components = []
+        while remaining:
+            start = min(remaining)
+            stack, component = [start], {start}
+            remaining.discard(start)
+            while stack:
+                for n in self.neighbours(stack.pop()) & remaining:
+                    remaining.discard(n)
+                    component.add(n)
+                    stack.append(n)
+            components.append(sorted(component))
+        return components
+
+    def shared_paths(self, numbers: Iterable[int]) -> Set[str]:
+        """Paths changed by more than one of `numbers`."""
+        seen: Set[str] = set()
+        shared: Set[str] = set()
+        for n in numbers:
+            files = self.prs[n].files
+            shared |= files & seen
+            seen |= files
+        return shared
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+import sys
+import argparse
+from pathlib import Path
+
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.state import SessionStore
+
+def main():
+    state_dir = SwarmConfig(env_path=repo_root / ".env").state_dir
+    parser = argparse.ArgumentParser(description="Import a legacy sessions.json into the session store")
+    parser.add_argument("--json", default=str(state_dir / "sessions.json"), help="Legacy sessions.json to import")
+    parser.add_argument("--db", default=str(state_dir / "sessions.db"), help="Session store database")
+    parser.add_argument("--export", action="store_true", help="Write the store back out to --json instead of importing")
+    args = parser.parse_args()
+
+    with SessionStore(args.db) as store:
+        if args.export:
+            store.export_json(args.json)
+            print(f"📤 Exported {store.count()} sessions to {args.json}")
+            return
+
+        if not Path(args.json).exists():
+            print(f"❌ File not found: {args.json}")
+            sys.exit(1)
+
+        imported = store.import_json(args.json)
+        print(f"📥 Imported {imported} sessions into {args.db} ({store.count()} total).")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,42 @@
 #!/usr/bin/env python3
+import asyncio
 import subprocess
 import json
 import time
 import sys
+import argparse
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-def run_command(command, shell=True):
-    """Utility to run shell commands and return output."""
-    try:
-        result = subprocess.run(
-            command, 
-            shell=shell, 
-            check=True, 
-            capture_output=True, 
-            text=True
-        )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Error executing command: {command}")
-        print(f"Stdout: {e.stdout}")
-        print(f"Stderr: {e.stderr}")
-        return None
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
+
+from research.swarm_core.config import SwarmConfig
+from research.swarm_core.files import atomic_write_json
+from research.utils.conflict_index import ConflictIndex
+
+# Fields fetched for every open PR in one paginated `gh pr list` call
+PR_FIELDS = "number,title,createdAt,isDraft,headRefName,files,mergeable,statusCheckRollup"
+
+# Check conclusions/states that mean CI is red
+FAILED_CHECKS = {"FAILURE", "ERROR", "TIMED_OUT", "CANCELLED", "ACTION_REQUIRED", "STARTUP_FAILURE"}
+
+# Outcomes of a single merge attempt
+MERGED = "merged"
+CONFLICTED = "conflicted"
+CI_FAILED = "ci_failed"
+FAILED = "failed"
+PREDICTED_CONFLICT = "predicted_conflict"
+
+CLUSTERS_FILE = "conflict_clusters.json"
+
+async def run_gh(*args) -> Tuple[int, str, str]:
+    """Runs `gh` without blocking the loop. Returns (exit code, stdout, stderr)."""
+    proc = await asyncio.create_subprocess_exec(
+        "gh", *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+    out, err = await proc.communicate()
+    return proc.returncode, out.decode(errors="replace").strip(), err.decode(errors="replace").strip()
 
 def check_gh_installed():
     """Verify that GitHub CLI is installed."""
@@ -29,83 +46,243 @@ def check_gh_installed():
     except (subprocess.CalledProcessError, FileNotFoundError):
         return False
 
-def get_open_prs():
-    """Fetch open PRs ordered by creation date."""
+class PullRequest:
+    def __init__(self, data: Dict[str, Any]):
+        self.number: int = data["number"]
+        self.title: str = data.get("title", "")
+        self.created_at: str = data.get("createdAt", "")
+        self.is_draft: bool = bool(data.get("isDraft"))
+        self.head: str = data.get("headRefName", "")
+        self.files: Set[str] = {f["path"] for f in data.get("files") or [] if f.get("path")}
+        self.mergeable: str = data.get("mergeable") or "UNKNOWN"
+        self.checks: List[Dict[str, Any]] = data.get("statusCheckRollup") or []
+
+    @property
+    def ci_failed(self) -> bool:
+        for check in self.checks:
+            outcome = check.get("conclusion") or check.get("state")
+            if outcome and outcome.upper() in FAILED_CHECKS:
+                return True
+        return False
+
+    def __repr__(self):
+        return f"PullRequest(#{self.number}, {len(self.files)} files)"
+
+async def fetch_open_prs(limit: int = 1000) -> List[PullRequest]:
+    """Fetches open PRs with their changed files in one call, oldest first.
+
+    `gh pr list` pages through the GraphQL API itself, so a single call
+    covers any `limit`.
+    """
     print("📋 Fetching open Pull Requests...")
-    cmd = 'gh pr list --state open --limit 100 --json number,createdAt'
-    output = run_command(cmd)
-    
-    if not output:
+    code, out, err = await run_gh("pr", "list", "--state", "open", "--limit", str(limit), "--json", PR_FIELDS)
+    if code != 0:
+        print(f"❌ Error listing PRs: {err}")
         return []
-        
     try:
-        prs = json.loads(output)
-        # Sort by creation date (oldest first)
-        prs.sort(key=lambda x: x['createdAt'])
-        return prs
+        prs = [PullRequest(data) for data in json.loads(out or "[]")]
     except (json.JSONDecodeError, KeyError) as e:
         print(f"❌ Error parsing PR list: {e}")
         return []
+    prs.sort(key=lambda pr: (pr.created_at, pr.number))
+    return prs
 
-import argparse
+class MergeReport:
+    def __init__(self, total: int):
+        self.total = total
+        self.outcomes: Dict[int, str] = {}
+        self.elapsed = 0.0
+        self.passes = 0
+        self.clusters: List[Dict[str, Any]] = []
 
-def process_pr(pr_number, current, total, dry_run=False):
-    """Attempt to merge a single PR."""
-    print("-" * 50)
-    print(f"🔨 Processing PR #{pr_number} ({current}/{total})...")
-    
-    if dry_run:
-        print(f"🔍 [Dry Run] Would merge PR #{pr_number}")
-        return True
+    def count(self, outcome: str) -> int:
+        return sum(1 for o in self.outcomes.values() if o == outcome)
 
-    # 1. Mark as ready (in case it's a draft)
-    run_command(f'gh pr ready {pr_number}')
-    
-    # 2. Attempt squash merge
-    merge_cmd = f'gh pr merge {pr_number} --squash --delete-branch'
-    result = run_command(merge_cmd)
-    
-    if result is not None:
-        print(f"✅ Success! PR #{pr_number} merged and branch deleted.")
-        return True
-    else:
-        print(f"⚠️  Conflict or CI Error on PR #{pr_number}. Skipping...")
-        return False
+    @property
+    def merged(self) -> int:
+        return self.count(MERGED)
+
+    def summary(self, dry_run: bool = False) -> str:
+        rate = self.merged / self.elapsed * 60 if self.elapsed > 0 else 0.0
+        verb = "Would have merged" if dry_run else "Merged"
+        predicted = self.count(PREDICTED_CONFLICT)
+        return (f"🏁 {verb} {self.merged}/{self.total} PRs in {self.elapsed:.1f}s ({rate:.1f} PRs/min). "
+                f"Conflicted: {self.count(CONFLICTED)}"
+                + (f" (+{predicted} predicted, not attempted)" if predicted else "")
+                + f", CI failed: {self.count(CI_FAILED)}, other failures: {self.count(FAILED)}.")
+
+def classify_failure(stderr: str) -> str:
+    text = stderr.lower()
+    if "conflict" in text or "not mergeable" in text:
+        return CONFLICTED
+    if "check" in text or "status" in text:
+        return CI_FAILED
+    return FAILED
+
+class MergeTrain:
+    """Merges open PRs concurrently, queueing PRs that share files.
+
+    Each round merges a batch of PRs with pairwise disjoint file sets;
+    a PR that overlaps an older one waits until that one has been tried,
+    then gets its own attempt. A PR only counts as conflicted when GitHub
+    reports it CONFLICTING or `gh pr merge` fails on a conflict.
+
+    With `predict_conflicts`, PRs touching paths that landed earlier in
+    the run are marked PREDICTED_CONFLICT and skipped instead (cheaper when
+    such PRs are known to need a rebase anyway). Dry runs never predict,
+    since nothing lands.
+    """
+
+    def __init__(self, concurrency: int = 4, dry_run: bool = False, predict_conflicts: bool = False):
+        self.concurrency = max(1, concurrency)
+        self.dry_run = dry_run
+        self.predict_conflicts = predict_conflicts
+
+    async def process_pr(self, pr: PullRequest) -> str:
+        """Attempts to merge a single PR and returns the outcome."""
+        if pr.ci_failed:
+            print(f"🔴 PR #{pr.number}: CI is failing. Skipping...")
+            return CI_FAILED
+
+        if self.dry_run:
+            print(f"🔍 [Dry Run] Would merge PR #{pr.number}")
+            return MERGED
+
+        # Drafts must be marked ready before they can be merged
+        if pr.is_draft:
+            await run_gh("pr", "ready", str(pr.number))
+
+        code, _, err = await run_gh("pr", "merge", str(pr.number), "--squash", "--delete-branch")
+        if code == 0:
+            print(f"✅ Success! PR #{pr.number} merged and branch deleted.")
+            return MERGED
+        outcome = classify_failure(err)
+        label = {CONFLICTED: "Conflict", CI_FAILED: "CI error"}.get(outcome, "Error")
+        print(f"⚠️  {label} on PR #{pr.number}. Skipping... ({err.splitlines()[-1] if err else 'no output'})")
+        return outcome
+
+    async def run(self, prs: List[PullRequest]) -> MergeReport:
+        report = MergeReport(len(prs))
+        started = time.monotonic()
+        index = ConflictIndex(prs)
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def merge(pr: PullRequest):
+            async with semaphore:
+                try:
+                    report.outcomes[pr.number] = await self.process_pr(pr)
+                except Exception as e:
+                    print(f"❌ PR #{pr.number}: {e}")
+                    report.outcomes[pr.number] = FAILED
+
+        # GitHub already knows these cannot merge into the current base
+        remaining = []
+        for pr in prs:
+            if pr.mergeable == "CONFLICTING":
+                print(f"⚠️  Conflict on PR #{pr.number} (reported by GitHub). Skipping...")
+                report.outcomes[pr.number] = CONFLICTED
+            else:
+                remaining.append(pr)
+
+        predict = self.predict_conflicts and not self.dry_run
+        landed_paths: Set[str] = set()
+        while remaining:
+            if predict:
+                at_risk = index.touching(landed_paths)
+                for pr in remaining:
+                    if pr.number in at_risk:
+                        report.outcomes[pr.number] = PREDICTED_CONFLICT
+                remaining = [pr for pr in remaining if pr.number not in at_risk]
+                if not remaining:
+                    break
+            batch = index.select_batch(remaining)
+            report.passes += 1
+            print(f"🧩 Round {report.passes}: merging {len(batch)} non-overlapping PRs "
+                  f"({len(remaining) - len(batch)} waiting).")
+            await asyncio.gather(*(merge(pr) for pr in batch))
+            for pr in batch:
+                if report.outcomes[pr.number] == MERGED:
+                    landed_paths |= pr.files
+            tried = {pr.number for pr in batch}
+            remaining = [pr for pr in remaining if pr.number not in tried]
+
+        report.clusters = self.conflict_clusters(index, report, landed_paths)
+        report.elapsed = time.monotonic() - started
+        return report
+
+    @staticmethod
+    def conflict_clusters(index: ConflictIndex, report: MergeReport, landed_paths: Set[str]) -> List[Dict[str, Any]]:
+        """Groups conflicting PRs that share paths, with the merged PRs blocking them."""
+        conflicting = [n for n, o in report.outcomes.items() if o in (CONFLICTED, PREDICTED_CONFLICT)]
+        merged = {n for n, o in report.outcomes.items() if o == MERGED}
+        clusters = []
+        for numbers in index.clusters(conflicting):
+            files = set().union(*(index.prs[n].files for n in numbers))
+            paths = index.shared_paths(numbers) | (files & landed_paths)
+            clusters.append({
+                "prs": [{"number": n, "title": index.prs[n].title, "head": index.prs[n].head} for n in numbers],
+                "paths": sorted(paths),
+                "blockedBy": sorted(index.touching(paths) & merged),
+            })
+        return clusters
+
+def write_clusters(clusters: List[Dict[str, Any]], path: Path):
+    """Records conflict clusters so their tasks can be re-dispatched on the new base."""
+    atomic_write_json(path, clusters)
+
+async def merge_open_prs(dry_run: bool = False, concurrency: int = 4, limit: int = 1000,
+                         predict_conflicts: bool = False,
+                         clusters_path: Optional[Path] = None) -> MergeReport:
+    """Fetches and merges every open PR. Used by the CLI and automate_cycle.
+
+    Conflict clusters are written to `clusters_path` if one is given.
+    """
+    prs = await fetch_open_prs(limit)
+    if not prs:
+        print("✅ No open PRs to process.")
+        return MergeReport(0)
+
+    print(f"📋 Found {len(prs)} open PRs.")
+    report = await MergeTrain(concurrency, dry_run, predict_conflicts).run(prs)
+    print("-" * 50)
+    print(report.summary(dry_run))
+    if report.clusters:
+        print(f"🪢 {len(report.clusters)} conflict clusters need re-dispatch:")
+        for cluster in report.clusters:
+            numbers = ", ".join(f"#{pr['number']}" for pr in cluster["prs"])
+            print(f"   {numbers} on {', '.join(cluster['paths'][:3]) or 'base changes'}"
+                  + (f" (blocked by {', '.join(f'#{n}' for n in cluster['blockedBy'])})" if cluster["blockedBy"] else ""))
+        if clusters_path and not dry_run:
+            write_clusters(report.clusters, clusters_path)
+            print(f"📝 Wrote conflict clusters to {clusters_path}")
+    if report.merged < report.total:
+        print("Remaining PRs require manual attention.")
+    return report
 
 def main():
     parser = argparse.ArgumentParser(description="🚂 Python Merge Train (Oldest -> Newest)")
     parser.add_argument("--dry-run", action="store_true", help="Show what would be merged without performing actual merges")
+    parser.add_argument("-j", "--concurrency", type=int, default=4, help="Max merges in flight (default: 4)")
+    parser.add_argument("--limit", type=int, default=1000, help="Max open PRs to fetch (default: 1000)")
+    parser.add_argument("--predict-conflicts", action="store_true",
+                        help="Skip PRs whose files were changed by a PR merged earlier in this run")
+    parser.add_argument("--clusters", help=f"Where to write conflict clusters for re-dispatch (default: state/{CLUSTERS_FILE})")
     args = parser.parse_args()
 
     print("🚂 Starting the Python Merge Train (Oldest -> Newest)...")
     if args.dry_run:
         print("🔍 RUNNING IN DRY-RUN MODE")
-    
+
     if not check_gh_installed():
         print("❌ Error: GitHub CLI (gh) is not installed.")
         sys.exit(1)
-        
-    prs = get_open_prs()
-    
-    if not prs:
-        print("✅ No open PRs to process.")
-        return
-
-    total = len(prs)
-    print(f"📋 Found {total} open PRs.")
-    
-    merged_count = 0
-    for i, pr in enumerate(prs, 1):
-        if process_pr(pr['number'], i, total, dry_run=args.dry_run):
-            merged_count += 1
-        
-        # Fast sleep to be nice to API
-        time.sleep(1)
-        
-    print("-" * 50)
-    status_text = "Would have merged" if args.dry_run else "Merged"
-    print(f"🏁 End of line. {status_text} {merged_count}/{total} PRs.")
-    print("Remaining PRs require manual attention.")
+
+    if args.clusters:
+        clusters_path = Path(args.clusters)
+    else:
+        clusters_path = SwarmConfig(env_path=repo_root / ".env").state_dir / CLUSTERS_FILE
+    asyncio.run(merge_open_prs(dry_run=args.dry_run, concurrency=args.concurrency, limit=args.limit,
+                               predict_conflicts=args.predict_conflicts, clusters_path=clusters_path))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+# States a session waits in until the client acts
+AWAITING_PLAN_APPROVAL = "AWAITING_PLAN_APPROVAL"
+AWAITING_USER_FEEDBACK = "AWAITING_USER_FEEDBACK"
+TERMINAL = {"COMPLETED", "FAILED"}
+
+
+class MockProfile:
+    """How the mock behaves. Rates are probabilities per request (or per session)."""
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02,
+                 tail_rate: float = 0.01, tail_latency: float = 1.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 key_rps: float = 0.0, key_burst: float = 10.0, retry_after: float = 1.0,
+                 step_seconds: float = 5.0, fail_rate: float = 0.05,
+                 feedback_rate: float = 0.0, plan_approval: bool = False,
+                 keys: Optional[List[str]] = None, repos: Optional[List[str]] = None,
+                 extra_sources: int = 0, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.key_rps = key_rps
+        self.key_burst = key_burst
+        self.retry_after = retry_after
+        self.step_seconds = step_seconds
+        self.fail_rate = fail_rate
+        self.feedback_rate = feedback_rate
+        self.plan_approval = plan_approval
+        self.keys = keys
+        self.repos = repos or ["yuichiinumaru/void_research"]
+        self.extra_sources = extra_sources
+        self.seed = seed
+
+
+def _timestamp(when: float) -> str:
+    return datetime.fromtimestamp(when, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class MockSession:
+    """One session; its state advances lazily whenever it is read."""
+
+    def __init__(self, session_id: str, api_key: str, payload: Dict[str, Any],
+                 profile: MockProfile, rng: random.Random):
+        now = time.time()
+        self.id = session_id
+        self.api_key = api_key
+        self.payload = payload
+        self.created = now
+        self.state = "QUEUED"
+        self.next_at = now + profile.step_seconds
+        self.step_seconds = profile.step_seconds
+        self.wants_approval = profile.plan_approval
+        self.wants_feedback = rng.random() < profile.feedback_rate
+        self.will_fail = rng.random() < profile.fail_rate
+        self.activities: List[Dict[str, Any]] = []
+        self._activity_ids = itertools.count(1)
+
+    @property
+    def name(self) -> str:
+        return f"sessions/{self.id}"
+
+    def _activity(self, originator: str, kind: str, body: Dict[str, Any]):
+        self.activities.append({
+            "name": f"{self.name}/activities/{next(self._activity_ids)}",
+            "createTime": _timestamp(time.time()),
+            "originator": originator,
+            kind: body,
+        })
+
+    def _enter(self, state: str, now: float):
+        self.state = state
+        self.next_at = now + self.step_seconds
+        if state == "PLANNING":
+            self._activity("agent", "progressUpdated", {"title": "Planning"})
+        elif state == AWAITING_PLAN_APPROVAL:
+            self._activity("agent", "planGenerated", {"plan": {"steps": [{"title": "Do the task"}]}})
+        elif state == "IN_PROGRESS":
+            self._activity("agent", "progressUpdated", {"title": "Working"})
+        elif state == AWAITING_USER_FEEDBACK:
+            self._activity("agent", "agentMessaged", {"agentMessage": "Should I proceed?"})
+        elif state == "COMPLETED":
+            self._activity("agent", "sessionCompleted", {})
+        elif state == "FAILED":
+            self._activity("agent", "sessionFailed", {"reason": "mock failure"})
+
+    def advance(self):
+        now = time.time()
+        while self.state not in TERMINAL and now >= self.next_at:
+            if self.state == "QUEUED":
+                self._enter("PLANNING", self.next_at)
+            elif self.state == "PLANNING":
+                self._enter(AWAITING_PLAN_APPROVAL if self.wants_approval else "IN_PROGRESS", self.next_at)
+            elif self.state == "IN_PROGRESS" and self.wants_feedback:
+                self.wants_feedback = False
+                self._enter(AWAITING_USER_FEEDBACK, self.next_at)
+            elif self.state == "IN_PROGRESS":
+                self._enter("FAILED" if self.will_fail else "COMPLETED", self.next_at)
+            else:
+                return  # waiting on the client
+
+    def approve(self):
+        if self.state == AWAITING_PLAN_APPROVAL:
+            self._activity("user", "planApproved", {})
+            self._enter("IN_PROGRESS", time.time())
+
+    def send_input(self, text: str):
+        self._activity("user", "userMessaged", {"userMessage": text})
+        if self.state == AWAITING_USER_FEEDBACK:
+            self._enter("IN_PROGRESS", time.time())
+
+    def to_json(self) -> Dict[str, Any]:
+        self.advance()
+        data = {
+            "name": self.name,
+            "id": self.id,
+            "title": self.payload.get("title", ""),
+            "prompt": self.payload.get("prompt", ""),
+            "sourceContext": self.payload.get("sourceContext", {}),
+            "state": self.state,
+            "createTime": _timestamp(self.created),
+            "updateTime": _timestamp(time.time()),
+        }
+        if self.state == "COMPLETED":
+            data["outputs"] = [{"pullRequest": {"url": f"https://github.com/mock/pull/{self.id}",
+                                                "title": data["title"]}}]
+        return data
+
+
+class MockJulesServer:
+    """Local stand-in for the Jules API, for benchmarks and offline runs.
+
+    Serves the endpoints swarm_core/api.py uses with the latency, error and
+    throttling behaviour of a MockProfile, and keeps per-route counters.
+    """
+
+    def __init__(self, profile: Optional[MockProfile] = None, prefix: str = "/v1alpha"):
+        self.profile = profile or MockProfile()
+        self.prefix = prefix.rstrip("/")
+        self.rng = random.Random(self.profile.seed)
+        self.sessions: Dict[str, MockSession] = {}
+        self.counters: Dict[str, int] = {}
+        self._buckets: Dict[str, List[float]] = {}  # key -> [tokens, updated]
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+
+        self.app = web.Application(middlewares=[self._middleware])
+        p = self.prefix
+        sid = "{session_id:[^/:]+}"
+        self.app.add_routes([
+            web.get(f"{p}/sources", self.list_sources),
+            web.get(f"{p}/sessions", self.list_sessions),
+            web.post(f"{p}/sessions", self.create_session),
+            web.get(f"{p}/sessions/{sid}", self.get_session),
+            web.post(f"{p}/sessions/{sid}:sendInput", self.send_input),
+            web.post(f"{p}/sessions/{sid}:approvePlan", self.approve_plan),
+            web.get(f"{p}/sessions/{sid}/activities", self.list_activities),
+            web.get(f"{p}/sessions/{sid}/{{resource}}", self.get_resource),
+        ])
+
+    def _count(self, name: str):
+        self.counters[name] = self.counters.get(name, 0) + 1
+
+    def _take_token(self, api_key: str) -> bool:
+        rate = self.profile.key_rps
+        if rate <= 0:
+            return True
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(api_key, [self.profile.key_burst, now])
+        bucket[0] = min(self.profile.key_burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True
+        return False
+
+    def _throttled(self) -> web.Response:
+        self._count("status_429")
+        return web.json_response({"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}}, status=429,
+                                 headers={"Retry-After": f"{self.profile.retry_after:g}"})
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler):
+        profile = self.profile
+        self._count("requests")
+        delay = profile.latency + self.rng.uniform(0, profile.jitter)
+        if self.rng.random() < profile.tail_rate:
+            delay += profile.tail_latency
+        await asyncio.sleep(delay)
+
+        api_key = request.headers.get("x-goog-api-key", "")
+        if not api_key or (profile.keys is not None and api_key not in profile.keys):
+            self._count("status_401")
+            return web.json_response({"error": {"code": 401, "status": "UNAUTHENTICATED"}}, status=401)
+        # Rate limit is decided after the latency, so a burst sees the bucket drain
+        if not self._take_token(api_key) or self.rng.random() < profile.throttle_rate:
+            return self._throttled()
+        if self.rng.random() < profile.error_rate:
+            self._count("status_500")
+            return web.json_response({"error": {"code": 500, "status": "INTERNAL"}}, status=500)
+
+        try:
+            response = await handler(request)
+        except web.HTTPException as e:
+            self._count(f"status_{e.status}")
+            raise
+        self._count(f"status_{response.status}")
+        return response
+
+    @staticmethod
+    def _page(items: List[Any], request: web.Request, default_size: int = 30):
+        size = max(1, min(100, int(request.query.get("pageSize", default_size))))
+        start = int(request.query.get("pageToken") or 0)
+        page = items[start:start + size]
+        token = str(start + size) if start + size < len(items) else None
+        return page, token
+
+    def _session(self, request: web.Request) -> MockSession:
+        session = self.sessions.get(request.match_info["session_id"])
+        if session is None or session.api_key != request.headers.get("x-goog-api-key"):
+            raise web.HTTPNotFound(text='{"error": {"code": 404, "status": "NOT_FOUND"}}',
+                                   content_type="application/json")
+        return session
+
+    async def list_sources(self, request: web.Request) -> web.Response:
+        self._count("GET sources")
+        repos = [f"mock/filler-{i}" for i in range(self.profile.extra_sources)] + self.profile.repos
+        sources = [{"name": f"sources/github/{r}", "id": f"github/{r}",
+                    "githubRepo": {"owner": r.split("/")[0], "repo": r.split("/")[1]}} for r in repos]
+        page, token = self._page(sources, request)
+        body: Dict[str, Any] = {"sources": page}
+        if token:
+            body["nextPageToken"] = token
+        return web.json_response(body)
+
+    async def create_session(self, request: web.Request) -> web.Response:
+        self._count("POST sessions")
+        payload = await request.json()
+        if not payload.get("prompt") or not payload.get("sourceContext", {}).get("source"):
+            return web.json_response({"error": {"code": 400, "message": "prompt and source are required"}}, status=400)
+        session_id = str(self.rng.randrange(10 ** 18, 10 ** 19))
+        session = MockSession(session_id, request.headers["x-goog-api-key"], payload, self.profile, self.rng)
+        self.sessions[session_id] = session
+        return web.json_response(session.to_json())
+
+    async def list_sessions(self, request: web.Request) -> web.Response:
+        self._count("GET sessions")
+        api_key = request.headers["x-goog-api-key"]
+        mine = [s for s in self.sessions.values() if s.api_key == api_key]
+        mine.sort(key=lambda s: s.created, reverse=True)
+        page, token = self._page(mine, request)
+        body: Dict[str, Any] = {"sessions": [s.to_json() for s in page]}
+        if token:
+            body["nextPageToken"] = token
+        return web.json_response(body)
+
+    async def get_session(self, request: web.Request) -> web.Response:
+        self._count("GET session")
+        return web.json_response(self._session(request).to_json())
+
+    async def send_input(self, request: web.Request) -> web.Response:
+        self._count("POST sendInput")
+        session = self._session(request)
+        payload = await request.json()
+        session.advance()
+        session.send_input(payload.get("input", {}).get("text") or payload.get("prompt", ""))
+        return web.json_response({})
+
+    async def approve_plan(self, request: web.Request) -> web.Response:
+        self._count("POST approvePlan")
+        session = self._session(request)
+        session.advance()
+        session.approve()
+        return web.json_response({})
+
+    async def list_activities(self, request: web.Request) -> web.Response:
+        self._count("GET activities")
+        session = self._session(request)
+        session.advance()
+        page, token = self._page(session.activities, request)
+        body: Dict[str, Any] = {"activities": page}
+        if token:
+            body["nextPageToken"] = token
+        return web.json_response(body)
+
+    async def get_resource(self, request: web.Request) -> web.Response:
+        self._count("GET other")
+        self._session(request)
+        return web.json_response({"error": {"code": 404, "status": "NOT_FOUND"}}, status=404)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Starts serving; returns the base URL (port 0 picks a free port)."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{bound}{self.prefix}"
+        return self.base_url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Jules API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Base response latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Extra uniform random latency")
+    parser.add_argument("--tail-rate", type=float, default=0.01, help="Share of requests that get --tail-latency added")
+    parser.add_argument("--tail-latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with HTTP 429")
+    parser.add_argument("--key-rps", type=float, default=0.0, help="Per-key rate limit (0 = none)")
+    parser.add_argument("--key-burst", type=float, default=10.0)
+    parser.add_argument("--step-seconds", type=float, default=5.0, help="Time a session spends in each state")
+    parser.add_argument("--fail-rate", type=float, default=0.05, help="Share of sessions that end FAILED")
+    parser.add_argument("--feedback-rate", type=float, default=0.0, help="Share of sessions that wait for user feedback")
+    parser.add_argument("--plan-approval", action="store_true", help="Sessions wait for :approvePlan")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    profile = MockProfile(latency=args.latency, jitter=args.jitter, tail_rate=args.tail_rate,
+                          tail_latency=args.tail_latency, error_rate=args.error_rate,
+                          throttle_rate=args.throttle_rate, key_rps=args.key_rps, key_burst=args.key_burst,
+                          step_seconds=args.step_seconds, fail_rate=args.fail_rate,
+                          feedback_rate=args.feedback_rate, plan_approval=args.plan_approval, seed=args.seed)
+    server = MockJulesServer(profile)
+    print(f"🧪 Mock Jules API on http://{args.host}:{args.port}{server.prefix}")
+    print(f"   Set JULES_API_BASE=http://{args.host}:{args.port}{server.prefix} to point the swarm at it.")
+    web.run_app(server.app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
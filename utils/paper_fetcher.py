@@ -0,0 +1,235 @@
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
+
+import aiohttp
+
+from research.swarm_core.retry import RetryPolicy, parse_retry_after
+
+ARXIV_PDF_URL = "https://arxiv.org/pdf/{}.pdf"
+
+# Outcomes
+DOWNLOADED, RESUMED, SKIPPED, FAILED, UNSUPPORTED = "downloaded", "resumed", "skipped", "failed", "unsupported"
+
+_ARXIV_ID = re.compile(r"(\d{4}\.\d{4,5}(?:v\d+)?)")
+_ARXIV_HOSTS = ("arxiv.org", "www.arxiv.org", "export.arxiv.org", "huggingface.co")
+_ACL_ID = re.compile(r"^/(\d{4}\.[a-z0-9-]+\.\d+|[A-Z]\d{2}-\d{4})(?:/|\.pdf)?$")
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE = re.compile(r"bytes \*/(\d+)")
+
+
+class FetchError(Exception):
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None,
+                 retryable: bool = True):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.retryable = retryable
+
+
+class FetchReport:
+    def __init__(self):
+        self.outcomes: Dict[str, str] = {}
+        self.errors: Dict[str, str] = {}
+        self.bytes = 0
+        self.retries = 0
+        self.elapsed = 0.0
+
+    def count(self, outcome: str) -> int:
+        return sum(1 for o in self.outcomes.values() if o == outcome)
+
+    def summary(self) -> str:
+        rate = self.bytes / self.elapsed / 1e6 if self.elapsed > 0 else 0.0
+        return (f"📚 {self.count(DOWNLOADED)} downloaded, {self.count(RESUMED)} resumed, "
+                f"{self.count(SKIPPED)} already present, {self.count(FAILED)} failed, "
+                f"{self.count(UNSUPPORTED)} without a known PDF link; "
+                f"{self.bytes / 1e6:.1f} MB in {self.elapsed:.1f}s ({rate:.2f} MB/s), {self.retries} retries.")
+
+
+class PaperFetcher:
+    """Downloads PDFs by id or link with bounded, resumable, crash-safe transfers.
+
+    Each file streams in `chunk_size` pieces into `<id>.pdf.part` and is
+    renamed to `<id>.pdf` only once its size matches Content-Length (or
+    Content-Range) and it starts with the PDF magic, so a final name always
+    means a complete file. A later run resumes a leftover `.part` with an
+    HTTP Range request. A fixed pool of `concurrency` workers pulls ids
+    from a queue (memory stays flat however long the list is), the
+    connector caps connections per host, and transient failures (429, 5xx,
+    dropped connections, short bodies) retry under a RetryPolicy.
+    """
+
+    def __init__(self, output_dir: Union[str, Path], url_template: str = ARXIV_PDF_URL,
+                 concurrency: int = 8, per_host: int = 4, retry_policy: Optional[RetryPolicy] = None,
+                 chunk_size: int = 64 * 1024, timeout: float = 120.0, verify_pdf: bool = True):
+        self.output_dir = Path(output_dir)
+        self.url_template = url_template
+        self.concurrency = max(1, concurrency)
+        self.per_host = max(1, per_host)
+        self.retry_policy = retry_policy or RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=60.0)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.verify_pdf = verify_pdf
+
+    def resolve(self, entry: str) -> Optional[Tuple[str, str]]:
+        """Maps an ids-file entry to (file stem, PDF URL), or None if there is no known PDF link.
+
+        Bare ids go through `url_template`; arXiv and Hugging Face paper
+        links are reduced to their arXiv id (so abs/html/pdf links share a
+        file), ACL Anthology and OpenReview pages map to their PDF, and
+        other *.pdf links are fetched as they are.
+        """
+        if not entry.startswith(("http://", "https://")):
+            return entry.replace("/", "_"), self.url_template.format(entry)
+        url = urlparse(entry)
+        host = url.netloc.lower()
+        match = _ARXIV_ID.search(url.path)
+        if host in _ARXIV_HOSTS and match:
+            return match.group(1), self.url_template.format(match.group(1))
+        match = _ACL_ID.match(url.path)
+        if host == "aclanthology.org" and match:
+            return f"acl_{match.group(1)}", f"https://aclanthology.org/{match.group(1)}.pdf"
+        if host == "openreview.net" and parse_qs(url.query).get("id"):
+            paper_id = parse_qs(url.query)["id"][0]
+            return f"openreview_{paper_id}", f"https://openreview.net/pdf?id={paper_id}"
+        if url.path.lower().endswith(".pdf"):
+            return re.sub(r"[^A-Za-z0-9._-]+", "_", f"{host}{url.path[:-4]}").strip("_"), entry
+        return None
+
+    def path_for(self, stem: str) -> Path:
+        return self.output_dir / f"{stem}.pdf"
+
+    async def _download(self, session: aiohttp.ClientSession, url: str, final: Path) -> Tuple[int, bool]:
+        """One attempt. Returns (bytes received, resumed). Leaves the .part behind on failure."""
+        part = final.with_name(final.name + ".part")
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+        async with session.get(url, headers=headers) as response:
+            if response.status == 416 and offset:
+                # Nothing left past our offset: either the .part is already whole, or it is junk
+                match = _UNSATISFIED_RANGE.match(response.headers.get("Content-Range", ""))
+                if match and int(match.group(1)) == offset:
+                    self._finish(part, final)
+                    return 0, True
+                part.unlink()
+                raise FetchError(f"HTTP 416 at offset {offset}; restarting from scratch")
+            if response.status not in (200, 206):
+                raise FetchError(f"HTTP {response.status}", status=response.status,
+                                 retry_after=parse_retry_after(response.headers.get("Retry-After")))
+
+            if response.status == 206:
+                match = _CONTENT_RANGE.match(response.headers.get("Content-Range", ""))
+                if not match or int(match.group(1)) != offset:
+                    part.unlink()
+                    raise FetchError("server answered a different range; restarting from scratch")
+                expected = int(match.group(3)) if match.group(3) != "*" else None
+                mode, resumed = "ab", True
+            else:
+                # Full body: the server ignored (or we did not send) a Range
+                expected = response.content_length
+                mode, resumed = "wb", False
+
+            received = 0
+            with open(part, mode) as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    f.write(chunk)
+                    received += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+
+        size = part.stat().st_size
+        if expected is not None and size != expected:
+            raise FetchError(f"incomplete body: {size} of {expected} bytes")
+        self._finish(part, final)
+        return received, resumed
+
+    def _finish(self, part: Path, final: Path):
+        if self.verify_pdf:
+            with open(part, "rb") as f:
+                magic = f.read(4)
+            if magic != b"%PDF":
+                part.unlink()
+                raise FetchError("response is not a PDF", retryable=False)
+        os.replace(part, final)
+
+    async def fetch_one(self, session: aiohttp.ClientSession, stem: str, url: str,
+                        report: FetchReport) -> Tuple[str, Optional[str]]:
+        """Fetches `url` into `<stem>.pdf`, retrying transient failures. Returns (outcome, error)."""
+        final = self.path_for(stem)
+        if final.exists():
+            return SKIPPED, None
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                received, resumed = await self._download(session, url, final)
+                report.bytes += received
+                return (RESUMED if resumed else DOWNLOADED), None
+            except FetchError as e:
+                error, status, retry_after, retryable = str(e), e.status, e.retry_after, e.retryable
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error, status, retry_after, retryable = str(e) or type(e).__name__, None, None, True
+            delay = self.retry_policy.next_delay(attempt, status, sent=True, idempotent=True,
+                                                 retry_after=retry_after) if retryable else None
+            if delay is None:
+                return FAILED, error
+            report.retries += 1
+            await asyncio.sleep(delay)
+
+    async def fetch_all(self, paper_ids: Iterable[str],
+                        on_done: Optional[Callable[[str, str, Optional[str]], None]] = None) -> FetchReport:
+        """Downloads every id (or link) not already present. Calls `on_done(entry, outcome, error)` per entry."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        report = FetchReport()
+        started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def worker():
+                while True:
+                    entry, stem, url = await queue.get()
+                    try:
+                        outcome, error = await self.fetch_one(session, stem, url, report)
+                    except OSError as e:
+                        outcome, error = FAILED, str(e)
+                    report.outcomes[entry] = outcome
+                    if error:
+                        report.errors[entry] = error
+                    if on_done:
+                        on_done(entry, outcome, error)
+                    queue.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+            try:
+                seen = set()
+                for entry in paper_ids:
+                    source = self.resolve(entry)
+                    if source is None or source[0] in seen:
+                        # No PDF link, or another entry (e.g. the abs page of the same paper) already covers it
+                        report.outcomes[entry] = UNSUPPORTED if source is None else SKIPPED
+                        if on_done:
+                            on_done(entry, report.outcomes[entry], None)
+                        continue
+                    seen.add(source[0])
+                    await queue.put((entry, *source))
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+        report.elapsed = time.monotonic() - started
+        return report
+
+
+def read_paper_ids(path: Union[str, Path]) -> List[str]:
+    """Ids from a file, one per line; blank lines and duplicates dropped, order kept."""
+    with open(path, "r", encoding="utf-8") as f:
+        return list(dict.fromkeys(line.strip() for line in f if line.strip()))
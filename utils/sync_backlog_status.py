@@ -1,38 +1,45 @@
 #!/usr/bin/env python3
-import os
 import re
+import sys
 from pathlib import Path
 
-# Paths
-IDEAS_DIR = Path(r"f:\AI\cryptosentinel-v1\docs\ideas")
-BACKLOG_PATH = Path(r"f:\AI\cryptosentinel-v1\docs\RESEARCH_BACKLOG.md")
+# Add repo root to path
+repo_root = Path(__file__).resolve().parent.parent.parent
+sys.path.insert(0, str(repo_root))
 
-def get_completed_paper_ids():
-    """Scans docs/ideas/*.md and returns a list of paper IDs."""
-    if not IDEAS_DIR.exists():
+from research.swarm_core.files import atomic_write
+
+# Paths (relative to the research checkout, so the script works from anywhere)
+RESEARCH_DIR = Path(__file__).resolve().parent.parent
+IDEAS_DIR = RESEARCH_DIR / "docs" / "ideas"
+BACKLOG_PATH = RESEARCH_DIR / "docs" / "RESEARCH_BACKLOG.md"
+
+def get_completed_paper_ids(ideas_dir=IDEAS_DIR):
+    """Scans docs/ideas/*.md and returns the set of paper IDs."""
+    if not ideas_dir.exists():
         print("⚠️  Ideas directory not found.")
-        return []
+        return set()
     
     # Files are named like {ID}.md. 
     # Need to handle case sensitivity if windows, but IDs are usually specific.
     # Also handle v versions e.g. 1707.02275v1.md -> paper ID is 1707.02275v1
     
-    ids = []
-    for f in IDEAS_DIR.glob("*.md"):
+    ids = set()
+    for f in ideas_dir.glob("*.md"):
         if f.name == ".gitkeep":
             continue
         # ID is filename minus extension
-        ids.append(f.stem)
+        ids.add(f.stem)
     return ids
 
-def sync_backlog():
-    if not BACKLOG_PATH.exists():
+def sync_backlog(backlog_path=BACKLOG_PATH, ideas_dir=IDEAS_DIR):
+    """Marks papers with a written idea file as completed. Returns how many were not already [x]."""
+    if not backlog_path.exists():
         print("❌ Backlog file not found.")
-        return
+        return 0
 
-    content = BACKLOG_PATH.read_text(encoding="utf-8")
-    original_len = len(content)
-    completed_ids = get_completed_paper_ids()
+    content = backlog_path.read_text(encoding="utf-8")
+    completed_ids = get_completed_paper_ids(ideas_dir)
     print(f"found {len(completed_ids)} completed papers.")
 
     updated_count = 0
@@ -59,7 +66,8 @@ def sync_backlog():
                 # Update Header to [x]
                 new_line = f"### [x] Paper {current_paper_id}"
                 new_lines.append(new_line)
-                updated_count += 1
+                if current_status_char.lower() != "x":
+                    updated_count += 1
             else:
                 new_lines.append(line)
         elif in_block and current_paper_id in completed_ids:
@@ -80,10 +88,11 @@ def sync_backlog():
     new_content = "\n".join(new_lines)
     
     if new_content != content:
-        BACKLOG_PATH.write_text(new_content, encoding="utf-8")
-        print(f"✅ Synced {updated_count} papers in RESEARCH_BACKLOG.md")
+        atomic_write(backlog_path, new_content)
+        print(f"✅ Synced {updated_count} papers in {backlog_path.name}")
     else:
         print("No changes needed.")
+    return updated_count
 
 if __name__ == "__main__":
     sync_backlog()